@@ -20,6 +20,20 @@ class Config:
     OSS_IMAGE_DIR = 'images/'
     OSS_VIDEO_SEGMENT_DIR = 'segments/'
     OSS_VIDEO_FINAL_DIR = 'finals/'
+    OSS_WORKFLOW_INDEX_PATH = 'indexes/workflows.json'  # 工作流列表索引
+
+    # 存储后端配置（对象键与OSS目录结构一致，本地存储根目录为 LOCAL_DATA_DIR）
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'auto')  # auto: 配置了OSS时用tiered，否则local；oss: 只用OSS；local: 只用本地磁盘；tiered: 本地热层+OSS
+    WRITE_BEHIND = os.getenv('WRITE_BEHIND', 'False') == 'True'  # tiered模式下工作流写入本地后即返回，异步合并写回OSS；工作流以本地为准、不再检测跨实例冲突，只能用于单实例（单进程）部署
+    WRITE_BEHIND_WORKERS = int(os.getenv('WRITE_BEHIND_WORKERS', '2'))  # 写回OSS的线程数
+    WRITE_BEHIND_RETRY_INTERVAL = float(os.getenv('WRITE_BEHIND_RETRY_INTERVAL', '2'))  # 写回失败的重试退避基数（秒）
+    WRITE_BEHIND_FLUSH_TIMEOUT = float(os.getenv('WRITE_BEHIND_FLUSH_TIMEOUT', '30'))  # 进程退出时等待写回完成的最长时间（秒）
+
+    # OSS传输配置
+    OSS_STREAM_PART_SIZE = max(int(os.getenv('OSS_STREAM_PART_SIZE', str(1024 * 1024))), 100 * 1024)  # 流式上传分片大小（字节），OSS要求不小于100KB
+    OSS_MULTIPART_THRESHOLD = int(os.getenv('OSS_MULTIPART_THRESHOLD', str(20 * 1024 * 1024)))  # 超过该大小（字节）使用分片断点续传
+    OSS_MULTIPART_PART_SIZE = max(int(os.getenv('OSS_MULTIPART_PART_SIZE', str(8 * 1024 * 1024))), 100 * 1024)  # 分片上传/分段下载的分片大小（字节）
+    OSS_MULTIPART_THREADS = int(os.getenv('OSS_MULTIPART_THREADS', '4'))  # 单个文件并发传输的线程数
 
     # 百炼API配置
     DASHSCOPE_API_KEY = os.getenv('DASHSCOPE_API_KEY')
@@ -28,17 +42,83 @@ class Config:
     TEXT_MODEL = os.getenv('TEXT_MODEL', 'qwen-max')  # 文本处理模型
     VIDEO_MODEL = os.getenv('VIDEO_MODEL', 'wanx2.1-i2v-turbo')  # 视频生成模型
 
+    # HTTP连接配置（百炼REST接口和视频下载共用连接池）
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '32'))  # 每个host的连接池大小，应不小于并发线程数
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '10'))  # 连接超时（秒）
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '60'))  # 读取超时（秒）
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))  # 429/5xx及连接错误最大重试次数
+    HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '1'))  # 重试退避基数（秒），实际等待带随机抖动
+
+    # 文案拆分配置
+    SPLIT_CHUNK_CHARS = int(os.getenv('SPLIT_CHUNK_CHARS', '1500'))  # 超过该字数的文案分块并发拆分（避免输出超出max_tokens被截断）
+    SPLIT_CONCURRENCY = int(os.getenv('SPLIT_CONCURRENCY', '4'))  # 分块拆分的并发调用数
+
+    # 提示词优化配置
+    PROMPT_OPTIMIZER = os.getenv('PROMPT_OPTIMIZER', 'template')  # template: 固定模板包装文案；llm: 调用文本模型生成
+    OPTIMIZE_BATCH_SIZE = int(os.getenv('OPTIMIZE_BATCH_SIZE', '15'))  # 批量优化时每次模型调用包含的片段数
+    OPTIMIZE_BATCH_CONCURRENCY = int(os.getenv('OPTIMIZE_BATCH_CONCURRENCY', '4'))  # 批量优化并发调用数
+
+    # 大模型结果缓存配置
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))  # 缓存有效期（秒）
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))  # 缓存条目上限，0表示关闭
+
     # 视频生成配置
     VIDEO_DURATION = int(os.getenv('VIDEO_DURATION', '5'))  # 视频时长（秒），支持1-5秒
     VIDEO_RESOLUTION = os.getenv('VIDEO_RESOLUTION', '1280*720')  # 分辨率
     VIDEO_PROMPT_EXTEND = os.getenv('VIDEO_PROMPT_EXTEND', 'true').lower() == 'true'  # 是否开启提示词优化
+    VIDEO_SUBMIT_CONCURRENCY = int(os.getenv('VIDEO_SUBMIT_CONCURRENCY', '4'))  # 批量提交视频任务的并发数（受百炼并发配额限制）
+
+    # 视频任务后台轮询配置
+    POLLER_MIN_INTERVAL = float(os.getenv('POLLER_MIN_INTERVAL', '3'))  # 初始轮询间隔（秒）
+    POLLER_MAX_INTERVAL = float(os.getenv('POLLER_MAX_INTERVAL', '30'))  # 最大轮询间隔（秒）
+    POLLER_BACKOFF_FACTOR = float(os.getenv('POLLER_BACKOFF_FACTOR', '1.5'))  # 状态无变化时的退避倍数
+    POLLER_TASK_TIMEOUT = int(os.getenv('POLLER_TASK_TIMEOUT', '3600'))  # 单个任务最长跟踪时间（秒）
+    POLLER_QUERY_CONCURRENCY = int(os.getenv('POLLER_QUERY_CONCURRENCY', '50'))  # 同时进行的任务状态查询数
+
+    # 视频转存队列配置
+    INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '4'))  # 转存线程数
+    INGEST_MAX_ATTEMPTS = int(os.getenv('INGEST_MAX_ATTEMPTS', '3'))  # 单个视频最大转存尝试次数
+
+    # 视频合成配置
+    MERGE_FETCH_WORKERS = int(os.getenv('MERGE_FETCH_WORKERS', '8'))  # 合成前并发获取片段的线程数
+    MERGE_CONCURRENCY = int(os.getenv('MERGE_CONCURRENCY', '2'))  # 同时进行的合成任务数
+    MERGE_TIMEOUT = int(os.getenv('MERGE_TIMEOUT', '1800'))  # 单次ffmpeg合成超时（秒）
+    MERGE_CHUNK_SIZE = int(os.getenv('MERGE_CHUNK_SIZE', '5'))  # 增量合成每块包含的片段数
+    MERGE_NORMALIZE_WORKERS = int(os.getenv('MERGE_NORMALIZE_WORKERS', '2'))  # 参数不一致的片段并发重新编码数
+
+    # 事件推送配置
+    EVENTS_HEARTBEAT_INTERVAL = int(os.getenv('EVENTS_HEARTBEAT_INTERVAL', '15'))  # SSE心跳间隔（秒）
+
+    # 工作流缓存配置
+    WORKFLOW_CACHE_SIZE = int(os.getenv('WORKFLOW_CACHE_SIZE', '256'))  # 缓存工作流数量上限，0表示关闭
+    WORKFLOW_CACHE_TTL = int(os.getenv('WORKFLOW_CACHE_TTL', '30'))  # 超过该时间（秒）后列举校验各对象ETag
+    WORKFLOW_LOAD_WORKERS = int(os.getenv('WORKFLOW_LOAD_WORKERS', '8'))  # 加载工作流时并发读取片段对象的线程数
+    WORKFLOW_SAVE_RETRIES = max(int(os.getenv('WORKFLOW_SAVE_RETRIES', '6')), 1)  # 保存冲突（被其他实例修改）时的最大尝试次数
+    WORKFLOW_SAVE_RETRY_INTERVAL = float(os.getenv('WORKFLOW_SAVE_RETRY_INTERVAL', '0.1'))  # 保存冲突重试的退避基数（秒），实际等待带随机抖动
+    WORKFLOW_INDEX_FLUSH_INTERVAL = float(os.getenv('WORKFLOW_INDEX_FLUSH_INTERVAL', '5'))  # 只有更新时间变化的索引条目延迟合并写入的间隔（秒）
+    WORKFLOW_SERIALIZATION = os.getenv('WORKFLOW_SERIALIZATION', 'json')  # json: 紧凑JSON（安装可选依赖orjson时自动使用）；msgpack: msgpack+zstd压缩（需安装msgpack和zstandard），读取时自动识别格式
+    WORKFLOW_ZSTD_LEVEL = int(os.getenv('WORKFLOW_ZSTD_LEVEL', '3'))  # msgpack格式的zstd压缩级别
+
+    # 媒体文件服务配置
+    MEDIA_SERVE_MODE = os.getenv('MEDIA_SERVE_MODE', 'proxy')  # proxy: 经Flask代理；redirect: 302跳转到OSS签名URL（需配置OSS）
+    MEDIA_SIGNED_URL_EXPIRES = int(os.getenv('MEDIA_SIGNED_URL_EXPIRES', '600'))  # 签名URL有效期（秒）
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'False') == 'True'  # 本地文件交给前置服务器通过 X-Sendfile 发送
+    MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '')  # Nginx internal location前缀，映射到 LOCAL_DATA_DIR
+    MEDIA_CACHE_TTL = int(os.getenv('MEDIA_CACHE_TTL', '300'))  # 本地媒体缓存校验有效期（秒）
+    MEDIA_CACHE_MAX_BYTES = int(os.getenv('MEDIA_CACHE_MAX_BYTES', str(10 * 1024 ** 3)))  # 本地媒体缓存总大小上限（字节）
 
     # 本地存储配置（开发环境）
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     LOCAL_DATA_DIR = os.path.join(BASE_DIR, 'data')
     LOCAL_WORKFLOW_DIR = os.path.join(LOCAL_DATA_DIR, 'workflows')
+    LOCAL_INGEST_JOB_DIR = os.path.join(LOCAL_DATA_DIR, 'ingest_jobs')  # 转存任务记录
+    LOCAL_MERGE_CACHE_DIR = os.path.join(LOCAL_DATA_DIR, 'merge_cache')  # 分块合成中间文件
+    LOCAL_LLM_CACHE_PATH = os.path.join(LOCAL_DATA_DIR, 'llm_cache.sqlite3')  # 大模型结果缓存
+    LOCAL_OSS_CHECKPOINT_DIR = os.path.join(LOCAL_DATA_DIR, 'oss_checkpoints')  # OSS断点续传记录
+    LOCAL_WRITE_BEHIND_PATH = os.path.join(LOCAL_DATA_DIR, 'write_behind.sqlite3')  # 待写回OSS的操作记录
 
     # 确保目录存在
     @staticmethod
     def init_app():
         os.makedirs(Config.LOCAL_WORKFLOW_DIR, exist_ok=True)
+        os.makedirs(Config.LOCAL_INGEST_JOB_DIR, exist_ok=True)
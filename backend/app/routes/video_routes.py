@@ -1,17 +1,23 @@
 import os
-import tempfile
-import requests
-from flask import Blueprint, request, jsonify, send_file
-from ..services.workflow_service import WorkflowService
+import json
+import queue
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Blueprint, Response, request, jsonify, send_file
+from ..services.workflow_service import get_workflow_service
 from ..services.bailian_service import BailianService
-from ..services.oss_service import get_oss_service
-from ..services.video_service import VideoService
+from ..services.storage_service import get_storage_service
+from ..services.merge_service import get_merge_service
+from ..services.task_poller import get_task_poller
+from ..services.ingest_service import get_ingest_queue
+from ..services.event_bus import get_event_bus
+from ..utils.media import send_local_media, stream_oss_media, redirect_to_oss
 from ..config import Config
 
 video_bp = Blueprint('video', __name__)
-workflow_service = WorkflowService()
+workflow_service = get_workflow_service()
 bailian_service = BailianService()
-video_service = VideoService()
+merge_service = get_merge_service()
 
 
 @video_bp.route('/api/workflow/<workflow_id>/split', methods=['POST'])
@@ -28,21 +34,11 @@ def split_text(workflow_id):
         return jsonify({"error": "文案内容不能为空"}), 400
 
     try:
-        segments = bailian_service.split_text(original_text)
-        
-        # 更新工作流
-        segment_list = []
-        for idx, text in enumerate(segments):
-            segment_list.append({
-                "index": idx,
-                "original": text,
-                "prompt": None,
-                "image_url": None,
-                "video_url": None,
-                "video_status": "pending",
-                "video_task_id": None
-            })
+        # force: 跳过缓存重新拆分
+        segments = bailian_service.split_text(original_text, force=bool(data.get('force')))
+        segment_list = _build_segment_list(segments)
 
+        # 更新工作流
         workflow_service.update_workflow(workflow_id, {
             "original_text": original_text,
             "segments": segment_list,
@@ -57,6 +53,64 @@ def split_text(workflow_id):
         return jsonify({"error": f"文案拆分失败: {str(e)}"}), 500
 
 
+@video_bp.route('/api/workflow/<workflow_id>/split-stream', methods=['POST'])
+def split_text_stream(workflow_id):
+    """流式拆分原始文案（NDJSON）
+
+    每拆分出一个片段推送一行 {"type": "segment", "index", "text"}，全部完成并保存工作流后推送
+    {"type": "done", "segments"}，失败时推送 {"type": "error", "error"}。
+    """
+    workflow = workflow_service.get_workflow(workflow_id)
+    if not workflow:
+        return jsonify({"error": "工作流不存在"}), 404
+
+    data = request.get_json() or {}
+    original_text = data.get('text', '')
+    if not original_text:
+        return jsonify({"error": "文案内容不能为空"}), 400
+    force = bool(data.get('force'))
+
+    def generate():
+        try:
+            segments = []
+            for text in bailian_service.split_text_stream(original_text, force=force):
+                yield _ndjson({"type": "segment", "index": len(segments), "text": text})
+                segments.append(text)
+
+            segment_list = _build_segment_list(segments)
+            workflow_service.update_workflow(workflow_id, {
+                "original_text": original_text,
+                "segments": segment_list,
+                "status": "draft"
+            })
+            yield _ndjson({"type": "done", "segments": segment_list})
+        except Exception as e:
+            yield _ndjson({"type": "error", "error": f"文案拆分失败: {str(e)}"})
+
+    # 禁止代理缓冲，保证片段及时送达
+    return Response(generate(), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+def _ndjson(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False) + '\n'
+
+
+def _build_segment_list(segments: list) -> list:
+    """根据拆分结果生成新的片段列表"""
+    return [{
+        "index": idx,
+        "original": text,
+        "prompt": None,
+        "image_url": None,
+        "video_url": None,
+        "video_status": "pending",
+        "video_task_id": None
+    } for idx, text in enumerate(segments)]
+
+
 @video_bp.route('/api/workflow/<workflow_id>/segment/<int:idx>/optimize', methods=['POST'])
 def optimize_prompt(workflow_id, idx):
     """优化片段提示词"""
@@ -67,17 +121,16 @@ def optimize_prompt(workflow_id, idx):
     if idx >= len(workflow.get('segments', [])):
         return jsonify({"error": "片段索引无效"}), 400
 
-    data = request.get_json()
+    data = request.get_json() or {}
     segment_text = data.get('text', workflow['segments'][idx]['original'])
 
     try:
-        prompt = bailian_service.optimize_to_prompt2(segment_text)
+        prompt = bailian_service.generate_prompt(segment_text, force=bool(data.get('force')))
 
-        # 更新片段
-        workflow['segments'][idx]['original'] = segment_text
-        workflow['segments'][idx]['prompt'] = prompt
-        workflow_service.update_workflow(workflow_id, {
-            "segments": workflow['segments']
+        # 只更新该片段
+        workflow_service.update_segment(workflow_id, idx, {
+            "original": segment_text,
+            "prompt": prompt
         })
 
         return jsonify({
@@ -88,6 +141,42 @@ def optimize_prompt(workflow_id, idx):
         return jsonify({"error": f"提示词优化失败: {str(e)}"}), 500
 
 
+@video_bp.route('/api/workflow/<workflow_id>/optimize-all', methods=['POST'])
+def optimize_all_prompts(workflow_id):
+    """批量优化所有片段的提示词（只保存一次工作流）"""
+    workflow = workflow_service.get_workflow(workflow_id)
+    if not workflow:
+        return jsonify({"error": "工作流不存在"}), 404
+
+    segments = workflow.get('segments', [])
+    if not segments:
+        return jsonify({"error": "没有可优化的片段"}), 400
+
+    data = request.get_json(silent=True) or {}
+    # only_missing: 只优化还没有提示词的片段
+    targets = [
+        idx for idx, seg in enumerate(segments)
+        if not (data.get('only_missing') and seg.get('prompt'))
+    ]
+
+    try:
+        prompts = bailian_service.generate_prompts(
+            [segments[idx]['original'] for idx in targets], force=bool(data.get('force'))
+        )
+    except Exception as e:
+        return jsonify({"error": f"提示词优化失败: {str(e)}"}), 500
+
+    # 按片段合并写入提示词，不覆盖模型调用期间后台任务对片段状态的更新
+    if not workflow_service.update_segments(workflow_id, {
+        idx: {"prompt": prompt} for idx, prompt in zip(targets, prompts)
+    }):
+        return jsonify({"error": "工作流不存在"}), 404
+
+    return jsonify({
+        "prompts": [{"index": idx, "prompt": prompt} for idx, prompt in zip(targets, prompts)]
+    })
+
+
 @video_bp.route('/api/workflow/<workflow_id>/segment/<int:idx>/upload-image', methods=['POST'])
 def upload_image(workflow_id, idx):
     """上传首帧图片"""
@@ -108,30 +197,19 @@ def upload_image(workflow_id, idx):
     try:
         image_data = file.read()
         
-        oss = get_oss_service()
-        if oss:
-            # 上传到OSS，保存OSS路径用于视频生成API
-            oss_path = oss.get_image_path(workflow_id, idx)
-            oss.upload_file(oss_path, image_data, 'image/jpeg')
-            # 存储OSS路径（内部使用）
-            oss_url = oss.get_public_url(oss_path)
-        else:
-            # 本地存储
-            local_dir = os.path.join(Config.LOCAL_DATA_DIR, 'images', workflow_id)
-            os.makedirs(local_dir, exist_ok=True)
-            local_path = os.path.join(local_dir, f'segment_{idx}.jpg')
-            with open(local_path, 'wb') as f:
-                f.write(image_data)
-            oss_url = None
+        storage = get_storage_service()
+        image_path = storage.get_image_path(workflow_id, idx)
+        storage.put_data(image_path, image_data, 'image/jpeg')
+        # 存储OSS路径用于视频生成API（内部使用），本地存储时为None
+        oss_url = storage.oss.get_public_url(image_path) if storage.oss else None
 
         # 前端显示用代理URL
         display_url = f"/api/image/{workflow_id}/{idx}"
 
         # 更新工作流：存储OSS URL用于视频生成，前端用代理URL
-        workflow['segments'][idx]['image_url'] = display_url
-        workflow['segments'][idx]['image_oss_url'] = oss_url  # 视频生成API用
-        workflow_service.update_workflow(workflow_id, {
-            "segments": workflow['segments']
+        workflow_service.update_segment(workflow_id, idx, {
+            "image_url": display_url,
+            "image_oss_url": oss_url  # 视频生成API用
         })
 
         return jsonify({
@@ -162,7 +240,7 @@ def generate_video(workflow_id, idx):
         return jsonify({"error": "i2v模式需要先上传首帧图片"}), 400
 
     # 生成OSS签名URL供百炼API访问（有效期5分钟）
-    oss = get_oss_service()
+    oss = get_storage_service().oss
     if oss:
         oss_path = oss.get_image_path(workflow_id, idx)
         image_url = oss.get_signed_url(oss_path, expires=300)
@@ -176,13 +254,10 @@ def generate_video(workflow_id, idx):
         if not result['success']:
             return jsonify({"error": result['error']}), 500
 
-        # 更新片段状态
-        workflow['segments'][idx]['video_task_id'] = result['task_id']
-        workflow['segments'][idx]['video_status'] = 'generating'
-        workflow_service.update_workflow(workflow_id, {
-            "segments": workflow['segments'],
-            "status": "processing"
-        })
+        submitted = [{"index": idx, "task_id": result['task_id']}]
+        error = _save_submitted_tasks(workflow_id, submitted)
+        if error:
+            return jsonify({"error": error, "task_id": result['task_id']}), 500
 
         return jsonify({
             "task_id": result['task_id'],
@@ -193,9 +268,116 @@ def generate_video(workflow_id, idx):
         return jsonify({"error": f"提交视频生成任务失败: {str(e)}"}), 500
 
 
+@video_bp.route('/api/workflow/<workflow_id>/generate-all', methods=['POST'])
+def generate_all_videos(workflow_id):
+    """批量提交所有就绪片段的视频生成任务（并发数受配额限制）"""
+    workflow = workflow_service.get_workflow(workflow_id)
+    if not workflow:
+        return jsonify({"error": "工作流不存在"}), 404
+
+    oss = get_storage_service().oss
+    if not oss:
+        return jsonify({"error": "本地模式不支持视频生成，请配置OSS"}), 400
+
+    # 就绪：已有提示词和首帧图，未完成且没有进行中的任务（百炼排队中的任务状态也是 pending）
+    segments = workflow.get('segments', [])
+    ready = [
+        idx for idx, seg in enumerate(segments)
+        if seg.get('prompt') and seg.get('image_url')
+        and seg.get('video_status') != 'completed' and not _has_active_task(seg)
+    ]
+    if not ready:
+        return jsonify({"error": "没有可生成视频的片段"}), 400
+
+    def submit(idx):
+        image_url = oss.get_signed_url(oss.get_image_path(workflow_id, idx), expires=300)
+        return bailian_service.submit_video_task(segments[idx]['prompt'], image_url)
+
+    submitted = []
+    failed = []
+    with ThreadPoolExecutor(max_workers=Config.VIDEO_SUBMIT_CONCURRENCY) as executor:
+        futures = {executor.submit(submit, idx): idx for idx in ready}
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"success": False, "error": f"提交视频生成任务失败: {str(e)}"}
+            if result['success']:
+                submitted.append({"index": idx, "task_id": result['task_id']})
+            else:
+                failed.append({"index": idx, "error": result['error']})
+
+    submitted.sort(key=lambda x: x['index'])
+    failed.sort(key=lambda x: x['index'])
+
+    # 所有任务ID一次性写回工作流（只写入提交成功的片段）
+    if submitted:
+        error = _save_submitted_tasks(workflow_id, submitted)
+        if error:
+            return jsonify({"error": error, "submitted": submitted, "failed": failed}), 500
+
+    return jsonify({
+        "submitted": submitted,
+        "failed": failed
+    })
+
+
+def _save_submitted_tasks(workflow_id, submitted) -> Optional[str]:
+    """把已提交的任务ID写回工作流并交给后台轮询器跟踪，写入失败时返回错误信息
+
+    轮询器只处理与工作流中 video_task_id 一致的任务，因此必须先保存再登记。
+    保存冲突已由 modify_workflow 退避重试；最终仍失败时记录任务ID，避免已计费的任务无迹可查。
+    """
+    try:
+        saved = workflow_service.update_segments(workflow_id, {
+            item['index']: {
+                "video_task_id": item['task_id'],
+                "video_status": 'generating',
+                "video_error": None
+            }
+            for item in submitted
+        }, {"status": "processing"})
+    except Exception as e:
+        saved = None
+        reason = str(e)
+    else:
+        reason = "工作流不存在"
+    if not saved:
+        task_ids = ', '.join(f"{item['index']}:{item['task_id']}" for item in submitted)
+        print(f"[视频生成] 任务已提交但写回工作流失败 {workflow_id} [{task_ids}]: {reason}")
+        return f"视频任务已提交但保存任务ID失败: {reason}"
+
+    poller = get_task_poller()
+    for item in submitted:
+        poller.track(workflow_id, item['index'], item['task_id'])
+    return None
+
+
+def _has_active_task(segment) -> bool:
+    """片段是否有已提交且未结束的视频任务"""
+    return bool(segment.get('video_task_id')) and \
+        segment.get('video_status') in ('pending', 'generating', 'ingesting')
+
+
+def _resume_segment_task(workflow_id, idx, segment):
+    """服务重启后轮询器为空，重新登记未完成的视频任务
+
+    转存中但没有活跃转存任务的片段也重新轮询，任务完成后会再次入队转存。
+    """
+    if not _has_active_task(segment):
+        return
+    task_id = segment['video_task_id']
+    if segment.get('video_status') == 'ingesting' and get_ingest_queue().is_active(task_id):
+        return
+    poller = get_task_poller()
+    if not poller.is_tracking(task_id):
+        poller.track(workflow_id, idx, task_id)
+
+
 @video_bp.route('/api/workflow/<workflow_id>/segment/<int:idx>/video-status', methods=['GET'])
 def get_video_status(workflow_id, idx):
-    """查询视频生成状态"""
+    """查询视频生成状态（读取后台轮询器写回的状态）"""
     workflow = workflow_service.get_workflow(workflow_id)
     if not workflow:
         return jsonify({"error": "工作流不存在"}), 404
@@ -204,75 +386,68 @@ def get_video_status(workflow_id, idx):
         return jsonify({"error": "片段索引无效"}), 400
 
     segment = workflow['segments'][idx]
-    task_id = segment.get('video_task_id')
+    status = segment.get('video_status', 'pending')
+    _resume_segment_task(workflow_id, idx, segment)
+
+    return jsonify({
+        "status": status,
+        "video_url": segment.get('video_url'),
+        "error": segment.get('video_error')
+    })
+
+
+@video_bp.route('/api/workflow/<workflow_id>/events', methods=['GET'])
+def workflow_events(workflow_id):
+    """推送片段状态变化和合成完成事件（Server-Sent Events）
+
+    事件总线只在单个进程内有效，多进程部署时其他进程产生的事件不会推送到本连接，
+    前端在有进行中的任务时另外慢速轮询工作流兜底。每个连接在存续期间占用一个线程。
+    """
+    # 先订阅再读取快照，避免两者之间发布的事件丢失（重复的事件与快照一致，不影响结果）
+    event_bus = get_event_bus()
+    subscriber = event_bus.subscribe(workflow_id)
+    workflow = workflow_service.get_workflow(workflow_id)
+    if not workflow:
+        event_bus.unsubscribe(workflow_id, subscriber)
+        return jsonify({"error": "工作流不存在"}), 404
 
-    if not task_id:
-        return jsonify({
-            "status": segment.get('video_status', 'pending'),
-            "video_url": segment.get('video_url')
-        })
+    # 连接建立时确保未完成的任务都在后台处理中
+    for idx, segment in enumerate(workflow.get('segments', [])):
+        _resume_segment_task(workflow_id, idx, segment)
 
-    try:
-        result = bailian_service.query_video_task(task_id)
-        
-        # 更新状态
-        workflow['segments'][idx]['video_status'] = result['status']
-        
-        if result['status'] == 'completed' and result.get('video_url'):
-            video_url = result['video_url']
-            
-            # 将视频转存到OSS
-            oss = get_oss_service()
-            if oss:
+    def generate():
+        try:
+            # 先推送当前快照，客户端据此同步断线期间的变化
+            yield event_bus.format_sse('snapshot', {
+                "segments": [{
+                    "index": idx,
+                    "status": seg.get('video_status', 'pending'),
+                    "video_url": seg.get('video_url'),
+                    "error": seg.get('video_error')
+                } for idx, seg in enumerate(workflow.get('segments', []))],
+                "final_video_url": workflow.get('final_video_url'),
+                "status": workflow.get('status')
+            })
+            while True:
                 try:
-                    # 下载视频
-                    response = requests.get(video_url, timeout=300)
-                    if response.status_code == 200:
-                        video_data = response.content
-                        
-                        # 上传到OSS
-                        oss_path = oss.get_video_segment_path(workflow_id, idx)
-                        oss.upload_file(oss_path, video_data, 'video/mp4')
-                        workflow['segments'][idx]['video_url'] = f"/api/video/{workflow_id}/{idx}"
-                        workflow['segments'][idx]['video_oss_path'] = oss_path
-                        print(f"视频转存OSS成功: {oss_path}")
-                        
-                        # 同时保存到本地（与OSS目录层级一致）
-                        local_path = os.path.join(Config.LOCAL_DATA_DIR, oss_path)
-                        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-                        with open(local_path, 'wb') as f:
-                            f.write(video_data)
-                        print(f"视频保存本地成功: {local_path}")
-                    else:
-                        # 下载失败
-                        workflow['segments'][idx]['video_status'] = 'failed'
-                        print(f"视频下载失败: HTTP {response.status_code}")
-                except Exception as e:
-                    # 转存失败
-                    workflow['segments'][idx]['video_status'] = 'failed'
-                    print(f"视频转存OSS失败: {e}")
-            else:
-                # 没有OSS配置
-                workflow['segments'][idx]['video_status'] = 'failed'
-                print("视频转存失败: OSS未配置")
-
-        workflow_service.update_workflow(workflow_id, {
-            "segments": workflow['segments']
-        })
-
-        return jsonify({
-            "status": result['status'],
-            "video_url": workflow['segments'][idx].get('video_url'),
-            "error": result.get('error')
-        })
+                    event, data = subscriber.get(timeout=Config.EVENTS_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    # 心跳，防止代理断开空闲连接
+                    yield ": keep-alive\n\n"
+                    continue
+                yield event_bus.format_sse(event, data)
+        finally:
+            event_bus.unsubscribe(workflow_id, subscriber)
 
-    except Exception as e:
-        return jsonify({"error": f"查询状态失败: {str(e)}"}), 500
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 
 @video_bp.route('/api/workflow/<workflow_id>/merge', methods=['POST'])
 def merge_videos(workflow_id):
-    """合成完整视频"""
+    """提交完整视频合成任务"""
     workflow = workflow_service.get_workflow(workflow_id)
     if not workflow:
         return jsonify({"error": "工作流不存在"}), 404
@@ -286,101 +461,29 @@ def merge_videos(workflow_id):
         if not seg.get('video_url'):
             return jsonify({"error": f"片段 {seg['index']} 尚未生成视频"}), 400
 
+    # 后台合成，进度通过事件流推送或查询合成状态接口
     try:
-        # 创建临时目录
-        temp_dir = tempfile.mkdtemp()
-        video_files = []
-        oss = get_oss_service()
-
-        # 下载所有视频片段
-        for i, seg in enumerate(segments):
-            local_path = os.path.join(temp_dir, f'segment_{i}.mp4')
-            video_url = seg.get('video_url', '')
-            
-            # 检查是否是内部代理路径
-            if video_url.startswith('/api/video/'):
-                # 从 OSS 获取
-                if oss:
-                    # 优先使用存储的 oss_path，否则根据规则生成
-                    oss_path = seg.get('video_oss_path') or oss.get_video_segment_path(workflow_id, i)
-                    try:
-                        video_data = oss.download_file(oss_path)
-                        with open(local_path, 'wb') as f:
-                            f.write(video_data)
-                        video_files.append(local_path)
-                        continue
-                    except Exception as e:
-                        print(f"从OSS下载视频失败: {e}")
-                
-                # 尝试从本地获取
-                local_video_path = os.path.join(
-                    Config.LOCAL_DATA_DIR, 'videos', 
-                    f'{workflow_id}_segment_{i}.mp4'
-                )
-                if os.path.exists(local_video_path):
-                    import shutil
-                    shutil.copy(local_video_path, local_path)
-                    video_files.append(local_path)
-                    continue
-                
-                return jsonify({"error": f"无法获取片段 {i} 的视频文件"}), 500
-            else:
-                # 外部URL，使用requests下载
-                if video_service.download_video(video_url, local_path):
-                    video_files.append(local_path)
-                else:
-                    return jsonify({"error": f"下载片段 {i} 失败"}), 500
-
-        # 合成视频
-        output_path = os.path.join(temp_dir, 'final.mp4')
-        success = video_service.merge_videos(video_files, output_path)
-
-        if not success:
-            return jsonify({"error": "视频合成失败"}), 500
+        job = merge_service.submit(workflow_id, segments)
+    except Exception as e:
+        return jsonify({"error": f"提交合成任务失败: {str(e)}"}), 500
+    return jsonify(job), 202
 
-        # 上传到OSS并保存到本地
-        oss = get_oss_service()
-        if oss:
-            with open(output_path, 'rb') as f:
-                video_data = f.read()
-            oss_path = oss.get_final_video_path(workflow_id)
-            oss.upload_file(oss_path, video_data, 'video/mp4')
-            
-            # 同时保存到本地（与OSS目录层级一致）
-            local_path = os.path.join(Config.LOCAL_DATA_DIR, oss_path)
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, 'wb') as f:
-                f.write(video_data)
-            print(f"合成视频保存成功: OSS={oss_path}, 本地={local_path}")
-            
-            # 使用代理URL而不是OSS直链
-            final_url = f"/api/final-video/{workflow_id}"
-        else:
-            # 本地存储
-            final_dir = os.path.join(Config.LOCAL_DATA_DIR, 'finals')
-            os.makedirs(final_dir, exist_ok=True)
-            final_local = os.path.join(final_dir, f'{workflow_id}.mp4')
-            
-            import shutil
-            shutil.copy(output_path, final_local)
-            final_url = f"/api/final-video/{workflow_id}"
 
-        # 更新工作流
-        workflow_service.update_workflow(workflow_id, {
-            "final_video_url": final_url,
-            "status": "completed"
-        })
+@video_bp.route('/api/workflow/<workflow_id>/merge-status', methods=['GET'])
+def get_merge_status(workflow_id):
+    """查询最近一次合成任务的状态和进度"""
+    job = merge_service.get_job(workflow_id)
+    if job:
+        return jsonify(job)
 
-        # 清理临时文件
-        video_service.cleanup_temp_files(video_files + [output_path])
-        os.rmdir(temp_dir)
+    workflow = workflow_service.get_workflow(workflow_id)
+    if not workflow:
+        return jsonify({"error": "工作流不存在"}), 404
 
-        return jsonify({
-            "final_video_url": final_url
-        })
-
-    except Exception as e:
-        return jsonify({"error": f"视频合成失败: {str(e)}"}), 500
+    # 服务重启后任务记录丢失，工作流仍处于合成中说明任务已中断
+    if workflow.get('status') == 'merging':
+        return jsonify({"status": "failed", "progress": 0.0, "error": "合成任务已中断，请重新合成"})
+    return jsonify({"error": "没有合成任务"}), 404
 
 
 @video_bp.route('/api/workflow/<workflow_id>/download', methods=['GET'])
@@ -398,29 +501,36 @@ def download_video(workflow_id):
     
     # 代理路径，从本地或OSS获取
     if final_url.startswith('/api/'):
+        storage = get_storage_service()
+        oss = storage.oss
+        oss_path = storage.get_final_video_path(workflow_id)
+        if oss and Config.MEDIA_SERVE_MODE == 'redirect':
+            return redirect_to_oss(
+                oss, oss_path,
+                as_attachment=True,
+                download_name=download_name
+            )
+
         # 先检查本地
-        local_path = os.path.join(Config.LOCAL_DATA_DIR, 'finals', f'{workflow_id}.mp4')
-        if os.path.exists(local_path):
-            return send_file(
+        local_path = storage.get_local_path(oss_path)
+        if local_path:
+            return send_local_media(
                 local_path,
-                mimetype='video/mp4',
+                'video/mp4',
                 as_attachment=True,
                 download_name=download_name
             )
         
-        # 从OSS获取
-        oss = get_oss_service()
+        # 从OSS流式获取
         if oss:
             try:
-                from io import BytesIO
-                oss_path = oss.get_final_video_path(workflow_id)
-                video_data = oss.download_file(oss_path)
-                return send_file(
-                    BytesIO(video_data),
-                    mimetype='video/mp4',
-                    as_attachment=True,
-                    download_name=download_name
-                )
+                meta = oss.get_object_meta(oss_path)
+                if meta:
+                    return stream_oss_media(
+                        oss, oss_path, meta['content_length'], 'video/mp4',
+                        as_attachment=True,
+                        download_name=download_name
+                    )
             except Exception as e:
                 print(f"下载视频失败: {e}")
         
@@ -452,16 +562,20 @@ def get_local_video(workflow_id):
 @video_bp.route('/api/image/<workflow_id>/<int:idx>', methods=['GET'])
 def get_image(workflow_id, idx):
     """获取图片（代理接口，支持本地和OSS）"""
+    storage = get_storage_service()
+    oss = storage.oss
+    oss_path = storage.get_image_path(workflow_id, idx)
+    if oss and Config.MEDIA_SERVE_MODE == 'redirect':
+        return redirect_to_oss(oss, oss_path)
+
     # 先检查本地
-    local_path = os.path.join(Config.LOCAL_DATA_DIR, 'images', workflow_id, f'segment_{idx}.jpg')
-    if os.path.exists(local_path):
+    local_path = storage.get_local_path(oss_path)
+    if local_path:
         return send_file(local_path, mimetype='image/jpeg')
     
     # 从OSS获取
-    oss = get_oss_service()
     if oss:
         try:
-            oss_path = oss.get_image_path(workflow_id, idx)
             image_data = oss.download_file(oss_path)
             from io import BytesIO
             return send_file(BytesIO(image_data), mimetype='image/jpeg')
@@ -471,81 +585,46 @@ def get_image(workflow_id, idx):
     return jsonify({"error": "图片不存在"}), 404
 
 
-@video_bp.route('/api/video/<workflow_id>/<int:idx>', methods=['GET'])
-def get_video(workflow_id, idx):
-    """获取视频片段（代理接口，本地优先，OSS备份）"""
-    from io import BytesIO
-    
-    oss = get_oss_service()
-    oss_path = oss.get_video_segment_path(workflow_id, idx) if oss else None
-    local_path = os.path.join(Config.LOCAL_DATA_DIR, oss_path) if oss_path else None
-    
-    # 检查本地文件
-    local_exists = local_path and os.path.exists(local_path)
-    local_mtime = os.path.getmtime(local_path) if local_exists else 0
-    
-    # 获取OSS文件元信息
-    oss_mtime = 0
-    if oss and oss_path:
-        meta = oss.get_object_meta(oss_path)
-        if meta:
-            oss_mtime = meta['last_modified']
-    
-    # 本地存在且时间晚于OSS，使用本地
-    if local_exists and local_mtime >= oss_mtime:
-        return send_file(local_path, mimetype='video/mp4')
+def _serve_cached_media(storage, oss_path):
+    """返回视频文件（本地副本优先，OSS流式兜底），未命中本地时在后台缓存到本地"""
+    oss = storage.oss
+    if oss and Config.MEDIA_SERVE_MODE == 'redirect':
+        return redirect_to_oss(oss, oss_path)
+
+    local_path = storage.get_local_path(oss_path)
+    if local_path:
+        return send_local_media(local_path, 'video/mp4')
+    if not oss:
+        return None
     
-    # 从OSS获取
-    if oss and oss_mtime > 0:
+    # 从OSS按Range流式获取，同时在后台同步到本地
+    meta = oss.get_object_meta(oss_path)
+    if meta:
         try:
-            video_data = oss.download_file(oss_path)
-            # 同步保存到本地
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, 'wb') as f:
-                f.write(video_data)
-            return send_file(BytesIO(video_data), mimetype='video/mp4')
+            response = stream_oss_media(oss, oss_path, meta['content_length'], 'video/mp4')
+            storage.prefetch(oss_path)
+            return response
         except Exception as e:
             print(f"获取视频失败: {e}")
     
+    return None
+
+
+@video_bp.route('/api/video/<workflow_id>/<int:idx>', methods=['GET'])
+def get_video(workflow_id, idx):
+    """获取视频片段（代理接口，本地优先，OSS备份）"""
+    storage = get_storage_service()
+    response = _serve_cached_media(storage, storage.get_video_segment_path(workflow_id, idx))
+    if response:
+        return response
     return jsonify({"error": "视频不存在"}), 404
 
 
 @video_bp.route('/api/final-video/<workflow_id>', methods=['GET'])
 def get_final_video(workflow_id):
     """获取合成后的完整视频（代理接口，本地优先，OSS备份）"""
-    from io import BytesIO
-    
-    oss = get_oss_service()
-    oss_path = oss.get_final_video_path(workflow_id) if oss else None
-    local_path = os.path.join(Config.LOCAL_DATA_DIR, oss_path) if oss_path else None
-    
-    # 检查本地文件
-    local_exists = local_path and os.path.exists(local_path)
-    local_mtime = os.path.getmtime(local_path) if local_exists else 0
-    
-    # 获取OSS文件元信息
-    oss_mtime = 0
-    if oss and oss_path:
-        meta = oss.get_object_meta(oss_path)
-        if meta:
-            oss_mtime = meta['last_modified']
-    
-    # 本地存在且时间晚于OSS，使用本地
-    if local_exists and local_mtime >= oss_mtime:
-        return send_file(local_path, mimetype='video/mp4')
-    
-    # 从OSS获取
-    if oss and oss_mtime > 0:
-        try:
-            video_data = oss.download_file(oss_path)
-            # 同步保存到本地
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, 'wb') as f:
-                f.write(video_data)
-            return send_file(BytesIO(video_data), mimetype='video/mp4')
-        except Exception as e:
-            print(f"获取完整视频失败: {e}")
-    
-    return jsonify({"error": "视频不存在"}), 404
-    
+    storage = get_storage_service()
+    response = _serve_cached_media(storage, storage.get_final_video_path(workflow_id))
+    if response:
+        return response
     return jsonify({"error": "视频不存在"}), 404
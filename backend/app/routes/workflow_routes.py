@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
-from ..services.workflow_service import WorkflowService
+from ..services.workflow_service import get_workflow_service, WorkflowConflictError
+from ..services.storage_service import get_storage_service
+from ..services.video_service import VideoService
 
 workflow_bp = Blueprint('workflow', __name__)
-workflow_service = WorkflowService()
+workflow_service = get_workflow_service()
+video_service = VideoService()
 
 
 @workflow_bp.route('/api/workflow', methods=['POST'])
@@ -17,9 +20,23 @@ def create_workflow():
 
 @workflow_bp.route('/api/workflows', methods=['GET'])
 def get_workflows():
-    """获取全部工作流列表"""
-    workflows = workflow_service.list_workflows()
-    return jsonify(workflows)
+    """获取工作流列表（支持 status/since 过滤和 offset/limit 分页）"""
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = request.args.get('limit')
+        limit = max(int(limit), 0) if limit is not None else None
+    except ValueError:
+        return jsonify({"error": "分页参数无效"}), 400
+
+    workflows, total = workflow_service.list_workflows(
+        status=request.args.get('status'),
+        since=request.args.get('since'),
+        offset=offset,
+        limit=limit
+    )
+    response = jsonify(workflows)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 
 @workflow_bp.route('/api/workflow/<workflow_id>', methods=['GET'])
@@ -38,7 +55,18 @@ def update_workflow(workflow_id):
     if not data:
         return jsonify({"error": "请求体不能为空"}), 400
     
-    workflow = workflow_service.update_workflow(workflow_id, data)
+    # 传入 version 时按版本做乐观并发控制，版本不一致返回409
+    version = data.get('version')
+    if version is not None:
+        try:
+            version = int(version)
+        except (TypeError, ValueError):
+            return jsonify({"error": "version 必须是整数"}), 400
+
+    try:
+        workflow = workflow_service.update_workflow(workflow_id, data, version)
+    except WorkflowConflictError as e:
+        return jsonify({"error": str(e)}), 409
     if not workflow:
         return jsonify({"error": "工作流不存在"}), 404
     return jsonify(workflow)
@@ -47,7 +75,17 @@ def update_workflow(workflow_id):
 @workflow_bp.route('/api/workflow/<workflow_id>', methods=['DELETE'])
 def delete_workflow(workflow_id):
     """删除工作流"""
-    success = workflow_service.delete_workflow(workflow_id)
+    try:
+        success = workflow_service.delete_workflow(workflow_id)
+    except Exception as e:
+        return jsonify({"error": f"删除工作流失败: {str(e)}"}), 500
     if not success:
         return jsonify({"error": "工作流不存在"}), 404
+    video_service.clear_merge_cache(workflow_id)
     return jsonify({"message": "删除成功"})
+
+
+@workflow_bp.route('/api/storage/stats', methods=['GET'])
+def get_storage_stats():
+    """存储后端状态（启用异步写回时包含待写回数量和写回延迟）"""
+    return jsonify(get_storage_service().get_stats())
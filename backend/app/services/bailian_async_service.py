@@ -0,0 +1,110 @@
+import asyncio
+from typing import List
+import httpx
+from openai import AsyncOpenAI
+from ..config import Config
+from ..utils.http import RETRY_STATUS_CODES, RETRY_AFTER_STATUS_CODES, get_backoff_delay, parse_retry_after
+from .llm_cache import get_llm_cache, make_llm_cache_key
+from .bailian_service import (
+    DASHSCOPE_COMPATIBLE_URL, VIDEO_SYNTHESIS_URL, TASK_QUERY_URL,
+    build_split_messages, parse_split_result, build_optimize_messages,
+    build_video_task_request, log_video_task_request, build_query_headers, parse_submit_result, normalize_task_result
+)
+
+
+class AsyncBailianService:
+    """百炼API异步客户端
+
+    接口与 BailianService 一致但均为协程，请求构造和结果解析（含任务状态映射）与同步客户端共用，
+    适合在一个事件循环中并发跟踪大量视频任务。连接池绑定创建时所在的事件循环，
+    不再使用时调用 aclose()。
+    """
+
+    def __init__(self):
+        self.client = AsyncOpenAI(
+            api_key=Config.DASHSCOPE_API_KEY,
+            base_url=DASHSCOPE_COMPATIBLE_URL
+        )
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=Config.HTTP_POOL_SIZE,
+                max_keepalive_connections=Config.HTTP_POOL_SIZE
+            )
+        )
+
+    async def aclose(self):
+        await self.http.aclose()
+        await self.client.close()
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """发送请求，429/5xx和连接错误时按抖动退避重试（POST只在429时重试，避免重复提交）
+
+        与 JitteredRetry 相同，响应带有 Retry-After 时按其指定的时间等待。
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            delay = None
+            try:
+                response = await self.http.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if method == 'POST' or attempt > Config.HTTP_MAX_RETRIES:
+                    raise
+            else:
+                retryable = response.status_code == 429 if method == 'POST' \
+                    else response.status_code in RETRY_STATUS_CODES
+                if not retryable or attempt > Config.HTTP_MAX_RETRIES:
+                    return response
+                if response.status_code in RETRY_AFTER_STATUS_CODES:
+                    delay = parse_retry_after(response.headers.get('Retry-After'))
+            if delay is None:
+                delay = get_backoff_delay(attempt, Config.HTTP_BACKOFF_FACTOR)
+            await asyncio.sleep(delay)
+
+    async def _chat(self, messages: List[dict], temperature: float, max_tokens: int, force: bool = False) -> str:
+        """调用文本模型，与同步客户端共用结果缓存（force=True 时跳过缓存重新生成）"""
+        cache = get_llm_cache()
+        key = make_llm_cache_key(Config.TEXT_MODEL, messages, temperature, max_tokens)
+        if not force:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        response = await self.client.chat.completions.create(
+            model=Config.TEXT_MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        content = response.choices[0].message.content.strip()
+        cache.set(key, content)
+        return content
+
+    async def split_text(self, original_text: str, force: bool = False) -> List[str]:
+        """调用qwen-max拆分文案为15s片段"""
+        result_text = await self._chat(build_split_messages(original_text), 0.7, 2000, force)
+        return parse_split_result(result_text, original_text)
+
+    async def optimize_to_prompt(self, segment_text: str, force: bool = False) -> str:
+        """调用qwen-max将文案转换为视频提示词"""
+        return await self._chat(build_optimize_messages(segment_text), 0.8, 200, force)
+
+    async def submit_video_task(self, prompt: str, image_url: str) -> dict:
+        """提交视频生成任务（i2v图生视频模式）"""
+        if not image_url:
+            return {
+                "success": False,
+                "error": "i2v模式需要提供首帧图片"
+            }
+
+        headers, payload = build_video_task_request(prompt, image_url)
+        log_video_task_request(prompt, image_url)
+        response = await self._request('POST', VIDEO_SYNTHESIS_URL, headers=headers, json=payload)
+        return parse_submit_result(response.status_code, response.json())
+
+    async def query_video_task(self, task_id: str) -> dict:
+        """查询视频任务状态（查询失败时抛出 TaskQueryError，任务状态未知）"""
+        url = TASK_QUERY_URL.format(task_id=task_id)
+        response = await self._request('GET', url, headers=build_query_headers())
+        return normalize_task_result(task_id, response.status_code, response.json())
@@ -1,22 +1,20 @@
 import json
+import queue
 import re
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 from openai import OpenAI
 from ..config import Config
+from ..utils.http import get_http_session
+from .llm_cache import get_llm_cache, make_llm_cache_key
 
 
-class BailianService:
-    """百炼API调用服务"""
-
-    def __init__(self):
-        self.client = OpenAI(
-            api_key=Config.DASHSCOPE_API_KEY,
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
-        )
+# 百炼接口地址
+DASHSCOPE_COMPATIBLE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+VIDEO_SYNTHESIS_URL = "https://dashscope.aliyuncs.com/api/v1/services/aigc/video-generation/video-synthesis"
+TASK_QUERY_URL = "https://dashscope.aliyuncs.com/api/v1/tasks/{task_id}"
 
-    def split_text(self, original_text: str) -> List[str]:
-        """调用qwen-max拆分文案为15s片段"""
-        system_prompt = """你是一个视频脚本专家。请将用户输入的口播文案拆分为多个适合15秒口播的片段。
+SPLIT_SYSTEM_PROMPT = """你是一个视频脚本专家。请将用户输入的口播文案拆分为多个适合15秒口播的片段。
 
 要求：
 1. 每个片段应该是完整的句子或段落，内容连贯
@@ -28,36 +26,7 @@ class BailianService:
 只返回JSON数组，不要有其他内容。示例格式：
 ["第一段文案内容", "第二段文案内容", "第三段文案内容"]"""
 
-        response = self.client.chat.completions.create(
-            model=Config.TEXT_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": original_text}
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-
-        result_text = response.choices[0].message.content.strip()
-        
-        # 尝试提取JSON数组
-        try:
-            # 尝试直接解析
-            segments = json.loads(result_text)
-        except json.JSONDecodeError:
-            # 尝试从文本中提取JSON数组
-            match = re.search(r'\[.*\]', result_text, re.DOTALL)
-            if match:
-                segments = json.loads(match.group())
-            else:
-                # 如果无法解析，按段落分割
-                segments = [p.strip() for p in original_text.split('\n\n') if p.strip()]
-
-        return segments
-
-    def optimize_to_prompt(self, segment_text: str) -> str:
-        """调用qwen-max将文案转换为视频提示词"""
-        system_prompt = """你是视频生成专家。请将口播文案转换为适合AI视频生成模型的提示词。
+OPTIMIZE_SYSTEM_PROMPT = """你是视频生成专家。请将口播文案转换为适合AI视频生成模型的提示词。
 
 要求：
 1. 提示词应该描述视觉场景、人物动作、环境氛围，而非口播内容本身
@@ -67,17 +36,431 @@ class BailianService:
 
 只返回提示词文本，不要有其他解释。"""
 
+OPTIMIZE_BATCH_SYSTEM_PROMPT = """你是视频生成专家。用户会给出一个JSON数组，每个元素是一段口播文案，请将每段文案分别转换为适合AI视频生成模型的提示词。
+
+要求：
+1. 提示词应该描述视觉场景、人物动作、环境氛围，而非口播内容本身
+2. 使用具体的视觉描述词汇
+3. 每条提示词保持简洁，控制在80字以内
+4. 可以包含镜头语言描述（如：特写、全景、平移等）
+5. 以JSON数组格式返回，元素个数和顺序与输入完全一致，每个元素是对应文案的提示词
+
+只返回JSON数组，不要有其他内容。"""
+
+# 拆分输出被截断时，剩余原文再次拆分的最大层数（超过后按段落分割）
+SPLIT_RETRY_DEPTH = 2
+
+# 百炼任务状态到片段视频状态的映射
+TASK_STATUS_MAP = {
+    "PENDING": "pending",
+    "RUNNING": "generating",
+    "SUCCEEDED": "completed",
+    "FAILED": "failed"
+}
+
+
+# 以下请求构造和结果解析由同步客户端 BailianService 和异步客户端 AsyncBailianService 共用
+
+def build_split_messages(original_text: str) -> List[dict]:
+    return [
+        {"role": "system", "content": SPLIT_SYSTEM_PROMPT},
+        {"role": "user", "content": original_text}
+    ]
+
+
+def parse_split_result(result_text: str, original_text: str) -> List[str]:
+    """解析拆分结果中的JSON数组，无法解析时按段落分割原文"""
+    result_text = result_text.strip()
+    try:
+        # 尝试直接解析
+        return json.loads(result_text)
+    except json.JSONDecodeError:
+        # 尝试从文本中提取JSON数组
+        match = re.search(r'\[.*\]', result_text, re.DOTALL)
+        if match:
+            return json.loads(match.group())
+        # 如果无法解析，按段落分割
+        return [p.strip() for p in original_text.split('\n\n') if p.strip()]
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """按段落（段落过长时按句子）将长文案切成不超过max_chars的块，保持原文顺序"""
+    if len(text) <= max_chars:
+        return [text]
+
+    # (所属段落序号, 文本)：过长的段落按句子拆开，同一段落的句子原样拼接，段落之间用空行分隔
+    units = []
+    for paragraph_idx, paragraph in enumerate(re.split(r'\n\s*\n', text)):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            units.append((paragraph_idx, paragraph))
+        else:
+            units.extend((paragraph_idx, s) for s in re.split(r'(?<=[。！？!?；;\n])', paragraph) if s)
+
+    chunks = []
+    current = ''
+    last_paragraph = None
+    for paragraph_idx, unit in units:
+        separator = '' if not current or paragraph_idx == last_paragraph else '\n\n'
+        if current and len(current) + len(separator) + len(unit) > max_chars:
+            chunks.append(current.strip())
+            current, separator = '', ''
+        current += separator + unit
+        last_paragraph = paragraph_idx
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def find_remaining_text(text: str, segments: List[str]) -> Optional[str]:
+    """按已拆分出的片段依次在原文中定位，返回尚未拆分的剩余原文（忽略空白差异），无法定位时返回None"""
+    # 去掉空白后比对，同时记录每个字符在原文中的位置
+    positions = [i for i, ch in enumerate(text) if not ch.isspace()]
+    compact = ''.join(text[i] for i in positions)
+    pos = 0
+    for segment in segments:
+        segment = ''.join(segment.split())
+        found = compact.find(segment, pos)
+        if found < 0:
+            return None
+        pos = found + len(segment)
+    if pos >= len(compact):
+        return ''
+    return text[positions[pos]:].strip()
+
+
+class TaskQueryError(Exception):
+    """查询视频任务状态失败（临时错误，任务可能仍在运行）"""
+
+
+class OutputTruncatedError(Exception):
+    """模型输出达到 max_tokens 被截断"""
+
+
+class JsonStringArrayParser:
+    """增量解析模型流式输出的JSON字符串数组，每个元素完整后立即返回"""
+
+    def __init__(self):
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+        self._literal = []
+
+    def feed(self, text: str) -> List[str]:
+        items = []
+        for char in text:
+            if not self._started:
+                self._started = char == '['
+            elif self._in_string:
+                self._literal.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    items.append(json.loads(''.join(self._literal)))
+                    self._literal = []
+            elif char == '"':
+                self._in_string = True
+                self._literal = [char]
+        return items
+
+
+def build_optimize_messages(segment_text: str) -> List[dict]:
+    return [
+        {"role": "system", "content": OPTIMIZE_SYSTEM_PROMPT},
+        {"role": "user", "content": f"请将以下口播文案转换为视频生成提示词：\n{segment_text}"}
+    ]
+
+
+def build_optimize_batch_messages(segment_texts: List[str]) -> List[dict]:
+    return [
+        {"role": "system", "content": OPTIMIZE_BATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps(segment_texts, ensure_ascii=False)}
+    ]
+
+
+def parse_optimize_batch_result(result_text: str, count: int) -> Optional[List[str]]:
+    """解析批量优化结果，不是长度为count的非空字符串数组时返回None"""
+    result_text = result_text.strip()
+    match = re.search(r'\[.*\]', result_text, re.DOTALL)
+    try:
+        prompts = json.loads(match.group() if match else result_text)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(prompts, list) or len(prompts) != count:
+        return None
+    if not all(isinstance(prompt, str) and prompt.strip() for prompt in prompts):
+        return None
+    return [prompt.strip() for prompt in prompts]
+
+
+def build_video_task_request(prompt: str, image_url: str) -> Tuple[dict, dict]:
+    """构造视频生成任务（i2v图生视频模式）的请求头和请求体"""
+    headers = {
+        "Authorization": f"Bearer {Config.DASHSCOPE_API_KEY}",
+        "Content-Type": "application/json",
+        "X-DashScope-Async": "enable"
+    }
+
+    payload = {
+        "model": Config.VIDEO_MODEL,
+        "input": {
+            "prompt": prompt,
+            "img_url": image_url
+        },
+        "parameters": {
+            "duration": Config.VIDEO_DURATION,
+            "resolution": Config.VIDEO_RESOLUTION,
+            "prompt_extend": Config.VIDEO_PROMPT_EXTEND
+        }
+    }
+    return headers, payload
+
+
+def log_video_task_request(prompt: str, image_url: str):
+    """打印提交视频任务的请求信息"""
+    print(f"\n{'='*60}")
+    print(f"[百炼] 提交视频生成任务")
+    print(f"[百炼] 模型: {Config.VIDEO_MODEL}")
+    print(f"[百炼] 图片URL: {image_url}")
+    print(f"[百炼] 提示词: {prompt[:100]}..." if len(prompt) > 100 else f"[百炼] 提示词: {prompt}")
+    print(f"[百炼] 参数: duration={Config.VIDEO_DURATION}, size={Config.VIDEO_RESOLUTION}, prompt_extend={Config.VIDEO_PROMPT_EXTEND}")
+    print(f"[百炼] 请求URL: {VIDEO_SYNTHESIS_URL}")
+
+
+def build_query_headers() -> dict:
+    return {"Authorization": f"Bearer {Config.DASHSCOPE_API_KEY}"}
+
+
+def parse_submit_result(status_code: int, result: dict) -> dict:
+    """解析提交任务的响应，返回 {success, task_id} 或 {success, error}"""
+    print(f"[百炼] HTTP状态码: {status_code}")
+    print(f"[百炼] 响应内容: {json.dumps(result, ensure_ascii=False, indent=2)}")
+    print(f"{'='*60}\n")
+
+    if "output" in result and "task_id" in result["output"]:
+        return {
+            "success": True,
+            "task_id": result["output"]["task_id"]
+        }
+    else:
+        return {
+            "success": False,
+            "error": result.get("message", str(result))
+        }
+
+
+def normalize_task_result(task_id: str, status_code: int, result: dict) -> dict:
+    """将任务查询响应归一化为 {status, video_url, error}
+
+    只有百炼返回的任务状态（如 FAILED）代表任务本身的结果；查询失败（非2xx、限流重试耗尽、
+    响应中没有output）时抛出 TaskQueryError，调用方应稍后重新查询而不是把任务视为失败。
+    """
+    print(f"\n[百炼] 查询任务状态: {task_id}")
+    print(f"[百炼] HTTP状态码: {status_code}")
+    print(f"[百炼] 响应内容: {json.dumps(result, ensure_ascii=False, indent=2)}")
+
+    if not 200 <= status_code < 300 or "output" not in result:
+        print(f"[百炼] 错误: 查询任务失败，稍后重试")
+        raise TaskQueryError(f"查询任务失败 (HTTP {status_code}): {result.get('message', str(result))}")
+
+    output = result["output"]
+    task_status = output.get("task_status", "UNKNOWN")
+
+    print(f"[百炼] 任务状态: {task_status}")
+    if output.get("video_url"):
+        print(f"[百炼] 视频URL: {output['video_url']}")
+    if output.get("message"):
+        print(f"[百炼] 消息: {output['message']}")
+
+    return {
+        "status": TASK_STATUS_MAP.get(task_status, "pending"),
+        "video_url": output.get("video_url"),
+        "error": output.get("message")
+    }
+
+
+class BailianService:
+    """百炼API调用服务"""
+
+    def __init__(self):
+        self.client = OpenAI(
+            api_key=Config.DASHSCOPE_API_KEY,
+            base_url=DASHSCOPE_COMPATIBLE_URL
+        )
+
+    def _chat(self, messages: List[dict], temperature: float, max_tokens: int, force: bool = False) -> str:
+        """调用文本模型，结果按输入缓存（force=True 时跳过缓存重新生成）"""
+        cache = get_llm_cache()
+        key = make_llm_cache_key(Config.TEXT_MODEL, messages, temperature, max_tokens)
+        if not force:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
         response = self.client.chat.completions.create(
             model=Config.TEXT_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"请将以下口播文案转换为视频生成提示词：\n{segment_text}"}
-            ],
-            temperature=0.8,
-            max_tokens=200
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        content = response.choices[0].message.content.strip()
+        cache.set(key, content)
+        return content
+
+    def _chat_stream(self, messages: List[dict], temperature: float, max_tokens: int,
+                     force: bool = False) -> Iterator[str]:
+        """流式调用文本模型，逐段返回增量文本；命中缓存时一次返回完整结果
+
+        输出因达到 max_tokens 被截断时，返回所有增量文本后抛出 OutputTruncatedError。
+        """
+        cache = get_llm_cache()
+        key = make_llm_cache_key(Config.TEXT_MODEL, messages, temperature, max_tokens)
+        if not force:
+            cached = cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        stream = self.client.chat.completions.create(
+            model=Config.TEXT_MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
         )
+        content = []
+        truncated = False
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta and choice.delta.content:
+                content.append(choice.delta.content)
+                yield choice.delta.content
+            if choice.finish_reason == 'length':
+                truncated = True
+
+        # 被截断的结果不缓存
+        if truncated:
+            raise OutputTruncatedError(f"模型输出超过 max_tokens={max_tokens} 被截断")
+        cache.set(key, ''.join(content).strip())
+
+    def _split_chunk_stream(self, text: str, force: bool = False, depth: int = 0) -> Iterator[str]:
+        """流式拆分单块文案，每解析出一个片段立即返回；无法解析时退回按段落分割
+
+        输出被截断时，在原文中定位已返回片段之后的剩余部分，切成更小的块再次拆分
+        （超过 SPLIT_RETRY_DEPTH 层后按段落分割），保证不丢失原文；无法定位时抛出 OutputTruncatedError。
+        """
+        parser = JsonStringArrayParser()
+        content = []
+        emitted = []
+        try:
+            for delta in self._chat_stream(build_split_messages(text), 0.7, 2000, force):
+                content.append(delta)
+                for segment in parser.feed(delta):
+                    emitted.append(segment)
+                    yield segment
+        except OutputTruncatedError:
+            remaining = find_remaining_text(text, emitted)
+            if remaining is None:
+                raise OutputTruncatedError("拆分结果被截断，且无法在原文中定位剩余部分")
+            if not remaining:
+                return
+            print(f"[百炼] 拆分结果被截断，剩余 {len(remaining)} 字重新拆分")
+            if depth >= SPLIT_RETRY_DEPTH:
+                yield from (p.strip() for p in remaining.split('\n\n') if p.strip())
+                return
+            for part in chunk_text(remaining, max(len(remaining) // 2, 1)):
+                yield from self._split_chunk_stream(part, force, depth + 1)
+            return
+
+        if not emitted:
+            yield from parse_split_result(''.join(content), text)
+
+    def split_text_stream(self, original_text: str, force: bool = False) -> Iterator[str]:
+        """流式拆分文案，按原文顺序逐个返回片段
+
+        超过 SPLIT_CHUNK_CHARS 的长文案先按段落切块，各块并发调用模型（避免输出被截断），
+        第一块的片段实时返回，后续块的结果按顺序依次返回。
+        """
+        chunks = chunk_text(original_text, Config.SPLIT_CHUNK_CHARS)
+        if len(chunks) == 1:
+            yield from self._split_chunk_stream(original_text, force)
+            return
 
-        return response.choices[0].message.content.strip()
+        done = object()
+        queues = [queue.Queue() for _ in chunks]
+
+        def run(text: str, results: queue.Queue):
+            try:
+                for segment in self._split_chunk_stream(text, force):
+                    results.put(segment)
+            except Exception as e:
+                results.put(e)
+            results.put(done)
+
+        executor = ThreadPoolExecutor(max_workers=min(len(chunks), Config.SPLIT_CONCURRENCY))
+        try:
+            for text, results in zip(chunks, queues):
+                executor.submit(run, text, results)
+            for results in queues:
+                while True:
+                    item = results.get()
+                    if item is done:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def split_text(self, original_text: str, force: bool = False) -> List[str]:
+        """调用qwen-max拆分文案为15s片段（长文案分块并发拆分）"""
+        return list(self.split_text_stream(original_text, force))
+
+    def optimize_to_prompt(self, segment_text: str, force: bool = False) -> str:
+        """调用qwen-max将文案转换为视频提示词"""
+        return self._chat(build_optimize_messages(segment_text), 0.8, 200, force)
+
+    def optimize_to_prompts(self, segment_texts: List[str], force: bool = False) -> List[str]:
+        """批量将文案转换为视频提示词
+
+        按 OPTIMIZE_BATCH_SIZE 分批，每批一次模型调用返回JSON数组，各批并发执行；
+        某批结果无法解析或条数不符时，该批退回逐条调用。
+        """
+        batch_size = max(Config.OPTIMIZE_BATCH_SIZE, 1)
+        batches = [segment_texts[i:i + batch_size] for i in range(0, len(segment_texts), batch_size)]
+
+        def optimize_batch(batch: List[str]) -> List[str]:
+            try:
+                result_text = self._chat(build_optimize_batch_messages(batch), 0.8, 200 * len(batch) + 100, force)
+                prompts = parse_optimize_batch_result(result_text, len(batch))
+                if prompts:
+                    return prompts
+                print(f"[百炼] 批量优化结果无效，改为逐条优化 {len(batch)} 个片段")
+            except Exception as e:
+                print(f"[百炼] 批量优化失败，改为逐条优化 {len(batch)} 个片段: {e}")
+            return [self.optimize_to_prompt(text, force) for text in batch]
+
+        with ThreadPoolExecutor(max_workers=min(len(batches), Config.OPTIMIZE_BATCH_CONCURRENCY) or 1) as executor:
+            return [prompt for prompts in executor.map(optimize_batch, batches) for prompt in prompts]
+
+    def generate_prompt(self, segment_text: str, force: bool = False) -> str:
+        """按 PROMPT_OPTIMIZER 配置生成单个片段的提示词（template: 固定模板；llm: 调用模型）"""
+        if Config.PROMPT_OPTIMIZER == 'llm':
+            return self.optimize_to_prompt(segment_text, force)
+        return self.optimize_to_prompt2(segment_text)
+
+    def generate_prompts(self, segment_texts: List[str], force: bool = False) -> List[str]:
+        """按 PROMPT_OPTIMIZER 配置批量生成提示词"""
+        if Config.PROMPT_OPTIMIZER == 'llm':
+            return self.optimize_to_prompts(segment_texts, force)
+        return [self.optimize_to_prompt2(text) for text in segment_texts]
 
     def optimize_to_prompt2(self, segment_text: str) -> str:
 
@@ -89,101 +472,19 @@ class BailianService:
 
     def submit_video_task(self, prompt: str, image_url: str) -> dict:
         """提交视频生成任务（i2v图生视频模式）"""
-        import requests
-        
         if not image_url:
             return {
                 "success": False,
                 "error": "i2v模式需要提供首帧图片"
             }
-        
-        url = "https://dashscope.aliyuncs.com/api/v1/services/aigc/video-generation/video-synthesis"
-        headers = {
-            "Authorization": f"Bearer {Config.DASHSCOPE_API_KEY}",
-            "Content-Type": "application/json",
-            "X-DashScope-Async": "enable"
-        }
-        
-        payload = {
-            "model": Config.VIDEO_MODEL,
-            "input": {
-                "prompt": prompt,
-                "img_url": image_url
-            },
-            "parameters": {
-                "duration": Config.VIDEO_DURATION,
-                "resolution": Config.VIDEO_RESOLUTION,
-                "prompt_extend": Config.VIDEO_PROMPT_EXTEND
-            }
-        }
 
-        print(f"\n{'='*60}")
-        print(f"[百炼] 提交视频生成任务")
-        print(f"[百炼] 模型: {Config.VIDEO_MODEL}")
-        print(f"[百炼] 图片URL: {image_url}")
-        print(f"[百炼] 提示词: {prompt[:100]}..." if len(prompt) > 100 else f"[百炼] 提示词: {prompt}")
-        print(f"[百炼] 参数: duration={Config.VIDEO_DURATION}, size={Config.VIDEO_RESOLUTION}, prompt_extend={Config.VIDEO_PROMPT_EXTEND}")
-        print(f"[百炼] 请求URL: {url}")
-
-        response = requests.post(url, headers=headers, json=payload)
-        result = response.json()
-        
-        print(f"[百炼] HTTP状态码: {response.status_code}")
-        print(f"[百炼] 响应内容: {json.dumps(result, ensure_ascii=False, indent=2)}")
-        print(f"{'='*60}\n")
-        
-        if "output" in result and "task_id" in result["output"]:
-            return {
-                "success": True,
-                "task_id": result["output"]["task_id"]
-            }
-        else:
-            return {
-                "success": False,
-                "error": result.get("message", str(result))
-            }
+        headers, payload = build_video_task_request(prompt, image_url)
+        log_video_task_request(prompt, image_url)
+        response = get_http_session().post(VIDEO_SYNTHESIS_URL, headers=headers, json=payload)
+        return parse_submit_result(response.status_code, response.json())
 
     def query_video_task(self, task_id: str) -> dict:
-        """查询视频任务状态"""
-        import requests
-        
-        url = f"https://dashscope.aliyuncs.com/api/v1/tasks/{task_id}"
-        headers = {
-            "Authorization": f"Bearer {Config.DASHSCOPE_API_KEY}"
-        }
-
-        response = requests.get(url, headers=headers)
-        result = response.json()
-        
-        print(f"\n[百炼] 查询任务状态: {task_id}")
-        print(f"[百炼] HTTP状态码: {response.status_code}")
-        print(f"[百炼] 响应内容: {json.dumps(result, ensure_ascii=False, indent=2)}")
-        
-        if "output" not in result:
-            print(f"[百炼] 错误: 响应中没有output字段")
-            return {
-                "status": "failed",
-                "error": result.get("message", str(result))
-            }
-
-        output = result["output"]
-        task_status = output.get("task_status", "UNKNOWN")
-        
-        print(f"[百炼] 任务状态: {task_status}")
-        if output.get("video_url"):
-            print(f"[百炼] 视频URL: {output['video_url']}")
-        if output.get("message"):
-            print(f"[百炼] 消息: {output['message']}")
-        
-        status_map = {
-            "PENDING": "pending",
-            "RUNNING": "generating",
-            "SUCCEEDED": "completed",
-            "FAILED": "failed"
-        }
-
-        return {
-            "status": status_map.get(task_status, "pending"),
-            "video_url": output.get("video_url"),
-            "error": output.get("message")
-        }
+        """查询视频任务状态（查询失败时抛出 TaskQueryError，任务状态未知）"""
+        url = TASK_QUERY_URL.format(task_id=task_id)
+        response = get_http_session().get(url, headers=build_query_headers())
+        return normalize_task_result(task_id, response.status_code, response.json())
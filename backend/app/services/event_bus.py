@@ -0,0 +1,64 @@
+import json
+import queue
+import threading
+from typing import Dict, List
+
+
+# 全局单例
+_event_bus_instance = None
+_event_bus_lock = threading.Lock()
+
+
+def get_event_bus():
+    """获取事件总线单例"""
+    global _event_bus_instance
+    if _event_bus_instance is None:
+        with _event_bus_lock:
+            if _event_bus_instance is None:
+                _event_bus_instance = EventBus()
+    return _event_bus_instance
+
+
+class EventBus:
+    """进程内工作流事件总线
+
+    按工作流ID分发事件，每个订阅者（一个SSE连接）持有独立的有界队列，
+    消费过慢的订阅者会丢弃新事件而不会阻塞发布方。
+    """
+
+    QUEUE_SIZE = 100
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, workflow_id: str) -> queue.Queue:
+        """订阅工作流事件"""
+        q = queue.Queue(maxsize=self.QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(workflow_id, []).append(q)
+        return q
+
+    def unsubscribe(self, workflow_id: str, q: queue.Queue):
+        """取消订阅"""
+        with self._lock:
+            subscribers = self._subscribers.get(workflow_id, [])
+            if q in subscribers:
+                subscribers.remove(q)
+            if not subscribers:
+                self._subscribers.pop(workflow_id, None)
+
+    def publish(self, workflow_id: str, event: str, data: dict):
+        """发布事件到该工作流的所有订阅者"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(workflow_id, []))
+        for q in subscribers:
+            try:
+                q.put_nowait((event, data))
+            except queue.Full:
+                print(f"[事件] 订阅者队列已满，丢弃事件: {workflow_id} {event}")
+
+    @staticmethod
+    def format_sse(event: str, data: dict) -> str:
+        """格式化为SSE消息"""
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+from ..config import Config
+from ..utils.http import get_http_session
+from .media_cache import get_media_cache
+from .storage_service import get_storage_service
+from .workflow_service import get_workflow_service
+
+
+# 全局单例
+_ingest_instance = None
+_ingest_lock = threading.Lock()
+
+
+def get_ingest_queue():
+    """获取视频转存队列单例（首次创建时恢复未完成的转存任务）"""
+    global _ingest_instance
+    if _ingest_instance is None:
+        with _ingest_lock:
+            if _ingest_instance is None:
+                _ingest_instance = IngestQueue()
+                _ingest_instance.recover()
+    return _ingest_instance
+
+
+class IngestQueue:
+    """视频转存队列
+
+    将百炼生成完成的视频下载并转存到OSS和本地。任务记录持久化在
+    LOCAL_INGEST_JOB_DIR 下，服务重启后未完成的任务会重新入队；
+    吞吐量由线程池大小（INGEST_WORKERS）决定，与请求数无关。
+    """
+
+    def __init__(self):
+        self.workflow_service = get_workflow_service()
+        self.job_dir = Config.LOCAL_INGEST_JOB_DIR
+        self._executor = ThreadPoolExecutor(max_workers=Config.INGEST_WORKERS, thread_name_prefix='video-ingest')
+        self._active = set()
+        self._lock = threading.Lock()
+
+    def _get_job_path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir, f"{job_id}.json")
+
+    def enqueue(self, workflow_id: str, segment_idx: int, task_id: str, video_url: str) -> str:
+        """登记转存任务，以视频任务ID作为转存任务ID（重复登记会被忽略）"""
+        job = {
+            "id": task_id,
+            "workflow_id": workflow_id,
+            "segment_idx": segment_idx,
+            "task_id": task_id,
+            "video_url": video_url,
+            "attempts": 0,
+            "created_at": datetime.now().isoformat()
+        }
+        self._submit(job)
+        return job["id"]
+
+    def is_active(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._active
+
+    def recover(self):
+        """重新入队服务重启前未完成的转存任务"""
+        os.makedirs(self.job_dir, exist_ok=True)
+        for filename in os.listdir(self.job_dir):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.job_dir, filename), 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+                print(f"[转存] 恢复未完成的转存任务: {job['id']}")
+                self._submit(job)
+            except Exception as e:
+                print(f"[转存] 恢复转存任务失败 {filename}: {e}")
+
+    def _submit(self, job: dict):
+        with self._lock:
+            if job["id"] in self._active:
+                return
+            self._active.add(job["id"])
+        self._save_job(job)
+        self._executor.submit(self._run, job)
+
+    def _run(self, job: dict):
+        try:
+            while True:
+                job["attempts"] += 1
+                self._save_job(job)
+                error = self._transfer(job)
+                if not error:
+                    updates = {
+                        "video_status": "completed",
+                        "video_url": f"/api/video/{job['workflow_id']}/{job['segment_idx']}",
+                        "video_oss_path": get_storage_service().get_video_segment_path(job['workflow_id'], job['segment_idx']),
+                        "video_error": None
+                    }
+                    break
+                if job["attempts"] >= Config.INGEST_MAX_ATTEMPTS:
+                    updates = {"video_status": "failed", "video_error": error}
+                    break
+                time.sleep(2 ** job["attempts"])  # 指数退避
+
+            self.workflow_service.update_task_segment(
+                job["workflow_id"], job["segment_idx"], job["task_id"], updates
+            )
+            self._remove_job(job["id"])
+        except Exception as e:
+            # 记录保留，下次重启时重试
+            print(f"[转存] 转存任务异常 {job['id']}: {e}")
+        finally:
+            with self._lock:
+                self._active.discard(job["id"])
+
+    def _transfer(self, job: dict) -> Optional[str]:
+        """下载视频并转存到OSS和本地，成功返回None，失败返回错误信息"""
+        oss = get_storage_service().oss
+        if not oss:
+            print("视频转存失败: OSS未配置")
+            return "OSS未配置"
+
+        try:
+            # 边下载边分片上传到OSS，同时写入本地（与OSS目录层级一致）
+            oss_path = oss.get_video_segment_path(job["workflow_id"], job["segment_idx"])
+            local_path = os.path.join(Config.LOCAL_DATA_DIR, oss_path)
+            with get_http_session().get(job["video_url"], stream=True,
+                                       timeout=(Config.HTTP_CONNECT_TIMEOUT, 300)) as response:
+                if response.status_code != 200:
+                    print(f"视频下载失败: HTTP {response.status_code}")
+                    return f"视频下载失败: HTTP {response.status_code}"
+                oss.upload_stream(
+                    oss_path,
+                    response.iter_content(chunk_size=64 * 1024),
+                    'video/mp4',
+                    tee_path=local_path
+                )
+            get_media_cache().register(oss, oss_path)
+            print(f"视频转存OSS成功: {oss_path}")
+            print(f"视频保存本地成功: {local_path}")
+            return None
+        except Exception as e:
+            print(f"视频转存OSS失败: {e}")
+            return f"视频转存失败: {e}"
+
+    def _save_job(self, job: dict):
+        with open(self._get_job_path(job["id"]), 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+
+    def _remove_job(self, job_id: str):
+        path = self._get_job_path(job_id)
+        if os.path.exists(path):
+            os.remove(path)
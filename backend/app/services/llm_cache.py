@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import List, Optional
+from ..config import Config
+
+
+# 全局单例
+_llm_cache_instance = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """获取大模型结果缓存单例"""
+    global _llm_cache_instance
+    if _llm_cache_instance is None:
+        with _llm_cache_lock:
+            if _llm_cache_instance is None:
+                _llm_cache_instance = LLMCache()
+    return _llm_cache_instance
+
+
+def make_llm_cache_key(model: str, messages: List[dict], temperature: float, max_tokens: int) -> str:
+    """按模型、完整消息（含系统提示词）、温度和输出长度计算缓存键"""
+    raw = json.dumps([model, messages, temperature, max_tokens], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """大模型结果缓存（SQLite，内容寻址）
+
+    缓存模型返回的原始文本，相同输入不再重复调用：
+    - 超过 LLM_CACHE_TTL 的条目视为失效
+    - 条目数超过 LLM_CACHE_MAX_ENTRIES 时按最近访问时间淘汰
+    - 缓存只是优化：SQLite出错（如 database is locked）时按未命中处理或跳过写入，不影响模型调用
+    """
+
+    # 每写入多少次检查一次淘汰
+    EVICT_CHECK_INTERVAL = 50
+
+    def __init__(self):
+        self.db_path = Config.LOCAL_LLM_CACHE_PATH
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = None
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS llm_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)')
+            self._conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            self._conn = None
+            print(f"[模型缓存] 大模型结果缓存不可用，已关闭: {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None and Config.LLM_CACHE_MAX_ENTRIES > 0
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    'SELECT value, created_at FROM llm_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if not row:
+                    return None
+                if now - row[1] > Config.LLM_CACHE_TTL:
+                    self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                    self._conn.commit()
+                    return None
+                self._conn.execute('UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key))
+                self._conn.commit()
+                return row[0]
+            except sqlite3.Error as e:
+                self._rollback()
+                print(f"[模型缓存] 读取大模型结果缓存失败，按未命中处理: {e}")
+                return None
+
+    def set(self, key: str, value: str):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+                    (key, value, now, now)
+                )
+                self._writes += 1
+                if self._writes % self.EVICT_CHECK_INTERVAL == 1:
+                    self._evict(now)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._rollback()
+                print(f"[模型缓存] 写入大模型结果缓存失败，跳过: {e}")
+
+    def _rollback(self):
+        try:
+            self._conn.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, now: float):
+        """删除过期条目，并按最近访问时间淘汰超出上限的条目（需持有锁）"""
+        self._conn.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - Config.LLM_CACHE_TTL,))
+        self._conn.execute(
+            'DELETE FROM llm_cache WHERE key IN ('
+            'SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (Config.LLM_CACHE_MAX_ENTRIES,)
+        )
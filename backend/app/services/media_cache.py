@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import threading
+from typing import Optional
+from ..config import Config
+
+
+# 全局单例
+_media_cache_instance = None
+_media_cache_lock = threading.Lock()
+
+
+def get_media_cache():
+    """获取本地媒体缓存单例"""
+    global _media_cache_instance
+    if _media_cache_instance is None:
+        with _media_cache_lock:
+            if _media_cache_instance is None:
+                _media_cache_instance = MediaCache()
+    return _media_cache_instance
+
+
+class MediaCache:
+    """本地媒体缓存
+
+    本地文件与OSS目录层级一致（LOCAL_DATA_DIR/<oss_path>），清单中记录每个文件的
+    ETag、大小、最近校验时间和最近访问时间：
+    - 校验未过期（MEDIA_CACHE_TTL）时直接使用本地文件，不访问OSS
+    - 过期后用带 If-None-Match 的条件GET（仅请求1个字节）校验
+    - 总大小超过 MEDIA_CACHE_MAX_BYTES 时按最近访问时间淘汰
+    """
+
+    # 访问时间变化时清单的最短持久化间隔（秒）
+    MANIFEST_SAVE_INTERVAL = 10
+
+    def __init__(self):
+        self.manifest_path = os.path.join(Config.LOCAL_DATA_DIR, 'media_manifest.json')
+        self._entries = self._load_manifest()
+        self._lock = threading.RLock()
+        self._filling = set()
+        self._last_saved_at = 0
+
+    def get_local_path(self, oss_path: str) -> str:
+        return os.path.join(Config.LOCAL_DATA_DIR, oss_path)
+
+    def resolve(self, oss, oss_path: str) -> Optional[str]:
+        """返回可直接使用的本地文件路径，本地没有有效副本时返回None"""
+        local_path = self.get_local_path(oss_path)
+        if not os.path.exists(local_path):
+            self._drop_entry(oss_path)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(oss_path)
+        now = time.time()
+
+        if entry and now - entry['verified_at'] < Config.MEDIA_CACHE_TTL:
+            self._touch(oss_path)
+            return local_path
+
+        if entry and entry.get('etag'):
+            try:
+                if oss.is_unmodified(oss_path, entry['etag']):
+                    with self._lock:
+                        entry['verified_at'] = now
+                    self._touch(oss_path)
+                    return local_path
+            except Exception as e:
+                print(f"[媒体缓存] 校验失败，继续使用本地文件 {oss_path}: {e}")
+                return local_path
+        else:
+            # 清单建立前写入的本地文件：不比OSS旧且大小一致时纳入缓存
+            meta = oss.get_object_meta(oss_path)
+            if meta and os.path.getmtime(local_path) >= meta['last_modified'] \
+                    and os.path.getsize(local_path) == meta['content_length']:
+                self._record(oss_path, meta['etag'], meta['content_length'])
+                return local_path
+
+        # 本地副本已过期
+        print(f"[媒体缓存] 本地文件已过期: {oss_path}")
+        self._drop_entry(oss_path)
+        return None
+
+    def register(self, oss, oss_path: str, etag: Optional[str] = None, size: Optional[int] = None):
+        """登记刚同时写入本地和OSS的文件，已知ETag和大小时不再查询OSS元信息"""
+        if etag is not None and size is not None:
+            self._record(oss_path, etag, size)
+            return
+        meta = oss.get_object_meta(oss_path)
+        if meta:
+            self._record(oss_path, meta['etag'], meta['content_length'])
+
+    def fill_async(self, oss, oss_path: str):
+        """后台将OSS对象下载到本地缓存（先写临时文件再原子替换，避免读到半个文件）"""
+        with self._lock:
+            if oss_path in self._filling:
+                return
+            self._filling.add(oss_path)
+
+        def download():
+            local_path = self.get_local_path(oss_path)
+            tmp_path = f"{local_path}.part"
+            try:
+                meta = oss.get_object_meta(oss_path)
+                oss.download_to_local(oss_path, tmp_path)
+                os.replace(tmp_path, local_path)
+                if meta:
+                    self._record(oss_path, meta['etag'], meta['content_length'])
+            except Exception as e:
+                print(f"[媒体缓存] 缓存媒体文件失败 {oss_path}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            finally:
+                with self._lock:
+                    self._filling.discard(oss_path)
+
+        threading.Thread(target=download, name='media-cache-fill', daemon=True).start()
+
+    def _record(self, oss_path: str, etag: Optional[str], size: int):
+        now = time.time()
+        with self._lock:
+            self._entries[oss_path] = {
+                "etag": etag,
+                "size": size,
+                "verified_at": now,
+                "accessed_at": now
+            }
+            self._evict()
+            self._save_manifest()
+
+    def _touch(self, oss_path: str):
+        with self._lock:
+            entry = self._entries.get(oss_path)
+            if entry:
+                entry['accessed_at'] = time.time()
+            if time.time() - self._last_saved_at >= self.MANIFEST_SAVE_INTERVAL:
+                self._save_manifest()
+
+    def _drop_entry(self, oss_path: str):
+        with self._lock:
+            if self._entries.pop(oss_path, None) is not None:
+                self._save_manifest()
+
+    def _evict(self):
+        """按最近访问时间淘汰，直到总大小不超过上限（需持有锁）"""
+        total = sum(entry['size'] for entry in self._entries.values())
+        if total <= Config.MEDIA_CACHE_MAX_BYTES:
+            return
+        for oss_path, entry in sorted(self._entries.items(), key=lambda item: item[1]['accessed_at']):
+            if total <= Config.MEDIA_CACHE_MAX_BYTES:
+                break
+            if oss_path in self._filling:
+                continue
+            try:
+                local_path = self.get_local_path(oss_path)
+                if os.path.exists(local_path):
+                    os.remove(local_path)
+                print(f"[媒体缓存] 淘汰本地文件: {oss_path}")
+            except Exception as e:
+                print(f"[媒体缓存] 淘汰文件失败 {oss_path}: {e}")
+                continue
+            total -= entry['size']
+            del self._entries[oss_path]
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"[媒体缓存] 读取清单失败，重新建立: {e}")
+            return {}
+
+    def _save_manifest(self):
+        """持久化清单（需持有锁）"""
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.manifest_path)
+            self._last_saved_at = time.time()
+        except Exception as e:
+            print(f"[媒体缓存] 保存清单失败: {e}")
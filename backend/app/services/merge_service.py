@@ -0,0 +1,230 @@
+import os
+import uuid
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+from ..config import Config
+from .event_bus import get_event_bus
+from .storage_service import get_storage_service
+from .video_service import VideoService
+from .workflow_service import get_workflow_service
+
+
+# 全局单例
+_merge_instance = None
+_merge_lock = threading.Lock()
+
+
+def get_merge_service():
+    """获取视频合成服务单例"""
+    global _merge_instance
+    if _merge_instance is None:
+        with _merge_lock:
+            if _merge_instance is None:
+                _merge_instance = MergeService()
+    return _merge_instance
+
+
+class MergeError(Exception):
+    """视频合成失败（消息可直接返回给前端）"""
+
+
+class MergeService:
+    """完整视频合成服务：获取片段、ffmpeg分块增量合成、转存OSS和本地
+
+    合成以后台任务运行，同时进行的合成数由 MERGE_CONCURRENCY 限制，
+    进度通过工作流事件（merge）推送。每个工作流只保留最近一次合成任务。
+    """
+
+    def __init__(self):
+        self.video_service = VideoService()
+        self.workflow_service = get_workflow_service()
+        self._executor = ThreadPoolExecutor(max_workers=Config.MERGE_CONCURRENCY, thread_name_prefix='video-merge')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, workflow_id: str, segments: List[dict]) -> dict:
+        """提交合成任务，该工作流已有进行中的任务时直接返回该任务（写入合成状态失败时抛出异常）"""
+        with self._lock:
+            job = self._jobs.get(workflow_id)
+            if job and job['status'] in ('queued', 'merging'):
+                return dict(job)
+            job = {
+                "id": str(uuid.uuid4()),
+                "workflow_id": workflow_id,
+                "status": "queued",
+                "progress": 0.0,
+                "error": None,
+                "final_video_url": None,
+                "created_at": datetime.now().isoformat()
+            }
+            self._jobs[workflow_id] = job
+
+        try:
+            self.workflow_service.update_workflow(workflow_id, {"status": "merging"})
+        except Exception:
+            # 任务未提交到线程池，移除以免之后的合成请求一直返回这个任务
+            with self._lock:
+                if self._jobs.get(workflow_id) is job:
+                    del self._jobs[workflow_id]
+            raise
+        self._publish(job)
+        self._executor.submit(self._run, job, segments)
+        return dict(job)
+
+    def get_job(self, workflow_id: str) -> Optional[dict]:
+        """获取工作流最近一次合成任务"""
+        with self._lock:
+            job = self._jobs.get(workflow_id)
+            return dict(job) if job else None
+
+    def _run(self, job: dict, segments: List[dict]):
+        workflow_id = job['workflow_id']
+        job['status'] = 'merging'
+        self._publish(job)
+
+        def on_progress(progress: float):
+            # 进度变化至少1%才推送
+            if progress - job['progress'] >= 0.01:
+                job['progress'] = progress
+                self._publish(job)
+
+        try:
+            final_url, signature = self.merge_workflow(workflow_id, segments, on_progress)
+            # final_video_signature 只由服务端写入（不在 update_workflow 允许的字段中）
+            self.workflow_service.modify_workflow(workflow_id, lambda workflow: workflow.update(
+                final_video_url=final_url,
+                final_video_signature=signature,
+                status="completed"
+            ))
+            job.update(status='completed', progress=1.0, final_video_url=final_url)
+        except Exception as e:
+            error = str(e) if isinstance(e, MergeError) else f"视频合成失败: {str(e)}"
+            print(f"[合成] 合成任务失败 {job['id']}: {error}")
+            self.workflow_service.update_workflow(workflow_id, {"status": "failed"})
+            job.update(status='failed', error=error)
+        self._publish(job)
+
+    def _publish(self, job: dict):
+        get_event_bus().publish(job['workflow_id'], 'merge', {
+            "job_id": job['id'],
+            "status": job['status'],
+            "progress": job['progress'],
+            "error": job['error'],
+            "final_video_url": job['final_video_url']
+        })
+
+    def merge_workflow(self, workflow_id: str, segments: List[dict],
+                       progress_callback: Optional[Callable[[float], None]] = None) -> Tuple[str, str]:
+        """合成工作流的完整视频，返回前端使用的代理URL和本次合成的输入签名
+
+        片段内容与上次合成完全一致时直接复用已有的完整视频；
+        否则分块增量合成，只重新获取和合成内容变化的块。
+        """
+        final_url = f"/api/final-video/{workflow_id}"
+        segment_keys = self.get_segment_keys(workflow_id, segments)
+        signature = self.video_service.get_merge_signature(segment_keys)
+
+        # 签名一致且完整视频对象仍然存在时才复用
+        storage = get_storage_service()
+        workflow = self.workflow_service.get_workflow(workflow_id) or {}
+        if (workflow.get('final_video_url') and workflow.get('final_video_signature') == signature
+                and storage.get_meta(storage.get_final_video_path(workflow_id))):
+            print(f"[合成] 片段未变化，复用已有完整视频: {workflow_id}")
+            return final_url, signature
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            def fetch(indexes: List[int], fetch_dir: str) -> List[str]:
+                return self.fetch_segments(workflow_id, segments, indexes, fetch_dir)
+
+            output_path = os.path.join(temp_dir, 'final.mp4')
+            if not self.video_service.merge_incremental(
+                    workflow_id, segment_keys, fetch, output_path, progress_callback):
+                raise MergeError("视频合成失败")
+
+            self._store_final_video(workflow_id, output_path)
+            return final_url, signature
+        finally:
+            # 清理临时文件
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def get_segment_keys(self, workflow_id: str, segments: List[dict]) -> List[str]:
+        """并发获取每个片段的内容标识（存储对象ETag，旧版本地文件用大小和修改时间，外部视频用URL）"""
+        with ThreadPoolExecutor(max_workers=Config.MERGE_FETCH_WORKERS) as executor:
+            return list(executor.map(
+                lambda item: self._get_segment_key(workflow_id, *item), enumerate(segments)
+            ))
+
+    def _get_segment_key(self, workflow_id: str, i: int, seg: dict) -> str:
+        video_url = seg.get('video_url', '')
+        if not video_url.startswith('/api/video/'):
+            return f"url:{video_url}"
+
+        storage = get_storage_service()
+        oss_path = seg.get('video_oss_path') or storage.get_video_segment_path(workflow_id, i)
+        meta = storage.get_meta(oss_path)
+        if meta:
+            return f"oss:{oss_path}:{meta['etag']}"
+
+        local_video_path = os.path.join(
+            Config.LOCAL_DATA_DIR, 'videos',
+            f'{workflow_id}_segment_{i}.mp4'
+        )
+        if os.path.exists(local_video_path):
+            stat = os.stat(local_video_path)
+            return f"local:{local_video_path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        raise MergeError(f"无法获取片段 {i} 的视频文件")
+
+    def fetch_segments(self, workflow_id: str, segments: List[dict], indexes: List[int],
+                       temp_dir: str) -> List[str]:
+        """并发获取指定片段到临时目录，按给定顺序返回文件路径"""
+        with ThreadPoolExecutor(max_workers=Config.MERGE_FETCH_WORKERS) as executor:
+            futures = [
+                executor.submit(
+                    self._fetch_segment, workflow_id, i, segments[i],
+                    os.path.join(temp_dir, f'segment_{i}.mp4')
+                )
+                for i in indexes
+            ]
+            return [future.result() for future in futures]
+
+    def _fetch_segment(self, workflow_id: str, i: int, seg: dict, local_path: str) -> str:
+        video_url = seg.get('video_url', '')
+
+        # 外部URL，使用requests下载
+        if not video_url.startswith('/api/video/'):
+            if self.video_service.download_video(video_url, local_path):
+                return local_path
+            raise MergeError(f"下载片段 {i} 失败")
+
+        # 优先使用存储的 oss_path，否则根据规则生成（本地副本命中时直接硬链接，不再下载）
+        storage = get_storage_service()
+        oss_path = seg.get('video_oss_path') or storage.get_video_segment_path(workflow_id, i)
+        try:
+            storage.download_to_local(oss_path, local_path)
+            return local_path
+        except Exception as e:
+            print(f"获取视频失败: {e}")
+
+        # 尝试从旧版本地目录获取
+        local_video_path = os.path.join(
+            Config.LOCAL_DATA_DIR, 'videos',
+            f'{workflow_id}_segment_{i}.mp4'
+        )
+        if os.path.exists(local_video_path):
+            shutil.copy(local_video_path, local_path)
+            return local_path
+
+        raise MergeError(f"无法获取片段 {i} 的视频文件")
+
+    def _store_final_video(self, workflow_id: str, output_path: str):
+        """保存到存储后端（分层存储时同时上传OSS和保存到本地）"""
+        storage = get_storage_service()
+        oss_path = storage.get_final_video_path(workflow_id)
+        storage.upload_local_file(oss_path, output_path)
+        print(f"合成视频保存成功: {storage.name}:{oss_path}")
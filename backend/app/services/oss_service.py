@@ -1,7 +1,9 @@
 import os
 import time
+import tempfile
 import oss2
-from typing import Optional
+from oss2.models import PartInfo
+from typing import Iterable, Optional, Tuple
 from ..config import Config
 
 
@@ -53,17 +55,29 @@ class OSSService:
 
     def upload_file(self, oss_path: str, data: bytes, content_type: Optional[str] = None) -> str:
         """上传文件到OSS（带重试）"""
+        self.put_data(oss_path, data, content_type)
+        return self.get_public_url(oss_path)
+
+    def put_data(self, oss_path: str, data: bytes, content_type: Optional[str] = None) -> str:
+        """上传数据到OSS（带重试），返回对象ETag"""
         headers = {}
         if content_type:
             headers['Content-Type'] = content_type
+
+        # 大文件落盘后走断点续传分片上传
+        if len(data) >= Config.OSS_MULTIPART_THRESHOLD:
+            with tempfile.NamedTemporaryFile(suffix=os.path.splitext(oss_path)[1]) as f:
+                f.write(data)
+                f.flush()
+                return self._resumable_upload(oss_path, f.name, headers)
         
         max_retries = 3
         last_error = None
         
         for attempt in range(max_retries):
             try:
-                self.bucket.put_object(oss_path, data, headers=headers)
-                return self.get_public_url(oss_path)
+                result = self.bucket.put_object(oss_path, data, headers=headers)
+                return result.etag
             except oss2.exceptions.ServerError as e:
                 last_error = e
                 print(f"[OSS] 上传失败 (尝试 {attempt + 1}/{max_retries}): {e}")
@@ -76,31 +90,135 @@ class OSSService:
         
         raise last_error if last_error else Exception("上传失败")
 
+    def upload_stream(self, oss_path: str, chunks: Iterable[bytes], content_type: Optional[str] = None,
+                      tee_path: Optional[str] = None) -> str:
+        """流式分片上传到OSS，可同时写入本地缓存文件
+
+        内存中最多缓存一个分片（OSS_STREAM_PART_SIZE），适合转存大视频。
+        """
+        headers = {}
+        if content_type:
+            headers['Content-Type'] = content_type
+
+        upload_id = self.bucket.init_multipart_upload(oss_path, headers=headers).upload_id
+        tee_tmp = f"{tee_path}.part" if tee_path else None
+        tee_file = None
+        parts = []
+        buffer = bytearray()
+
+        def flush_part():
+            part_number = len(parts) + 1
+            result = self.bucket.upload_part(oss_path, upload_id, part_number, bytes(buffer))
+            parts.append(PartInfo(part_number, result.etag))
+            buffer.clear()
+
+        try:
+            if tee_tmp:
+                os.makedirs(os.path.dirname(tee_tmp), exist_ok=True)
+                tee_file = open(tee_tmp, 'wb')
+
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if tee_file:
+                    tee_file.write(chunk)
+                buffer.extend(chunk)
+                if len(buffer) >= Config.OSS_STREAM_PART_SIZE:
+                    flush_part()
+
+            if buffer or not parts:
+                flush_part()
+            self.bucket.complete_multipart_upload(oss_path, upload_id, parts)
+        except Exception:
+            self.bucket.abort_multipart_upload(oss_path, upload_id)
+            if tee_file:
+                tee_file.close()
+                os.remove(tee_tmp)
+            raise
+
+        if tee_file:
+            tee_file.close()
+            os.replace(tee_tmp, tee_path)
+        return self.get_public_url(oss_path)
+
     def upload_local_file(self, oss_path: str, local_path: str) -> str:
-        """上传本地文件到OSS"""
-        self.bucket.put_object_from_file(oss_path, local_path)
+        """上传本地文件到OSS（超过 OSS_MULTIPART_THRESHOLD 时并发分片、断点续传）"""
+        self._resumable_upload(oss_path, local_path)
         return self.get_public_url(oss_path)
 
+    def _resumable_upload(self, oss_path: str, local_path: str, headers: Optional[dict] = None) -> str:
+        """断点续传上传，失败重试时只上传缺失的分片，返回对象ETag"""
+        store = oss2.ResumableStore(root=Config.LOCAL_OSS_CHECKPOINT_DIR, dir='upload')
+        return self._retry_transfer('上传', lambda: oss2.resumable_upload(
+            self.bucket, oss_path, local_path,
+            store=store,
+            headers=headers,
+            multipart_threshold=Config.OSS_MULTIPART_THRESHOLD,
+            part_size=Config.OSS_MULTIPART_PART_SIZE,
+            num_threads=Config.OSS_MULTIPART_THREADS
+        ).etag)
+
+    @staticmethod
+    def _retry_transfer(action: str, transfer):
+        """重试断点续传操作（断点信息保存在 LOCAL_OSS_CHECKPOINT_DIR，重试从断点继续）"""
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                return transfer()
+            except (oss2.exceptions.RequestError, oss2.exceptions.ServerError) as e:
+                print(f"[OSS] {action}失败 (尝试 {attempt + 1}/{max_retries}): {e}")
+                if attempt == max_retries - 1:
+                    raise
+                time.sleep(2 ** attempt)  # 指数退避
+
     def download_file(self, oss_path: str) -> bytes:
         """从OSS下载文件"""
         result = self.bucket.get_object(oss_path)
         return result.read()
 
+    def get_object_stream(self, oss_path: str, byte_range: Optional[Tuple[int, int]] = None):
+        """获取OSS对象的流式读取结果（可指定闭区间字节范围），调用方负责 close()"""
+        return self.bucket.get_object(oss_path, byte_range=byte_range)
+
+    def download_file_with_etag(self, oss_path: str) -> Tuple[bytes, str]:
+        """从OSS下载文件，同时返回对象ETag"""
+        result = self.bucket.get_object(oss_path)
+        return result.read(), result.etag
+
     def get_object_meta(self, oss_path: str) -> Optional[dict]:
         """获取OSS对象元信息（包含最后修改时间）"""
         try:
             meta = self.bucket.get_object_meta(oss_path)
             return {
                 'last_modified': meta.last_modified,  # Unix timestamp
-                'content_length': meta.content_length
+                'content_length': meta.content_length,
+                'etag': meta.etag
             }
         except Exception:
             return None
 
+    def is_unmodified(self, oss_path: str, etag: str) -> bool:
+        """用条件GET（If-None-Match，仅请求1个字节）判断对象是否仍为指定ETag"""
+        try:
+            result = self.bucket.get_object(oss_path, byte_range=(0, 0), headers={'If-None-Match': f'"{etag}"'})
+            result.close()
+            return False
+        except oss2.exceptions.NotModified:
+            return True
+        except oss2.exceptions.NoSuchKey:
+            return False
+
     def download_to_local(self, oss_path: str, local_path: str):
-        """下载OSS文件到本地"""
+        """下载OSS文件到本地（超过 OSS_MULTIPART_THRESHOLD 时并发分段下载、断点续传）"""
         os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        self.bucket.get_object_to_file(oss_path, local_path)
+        store = oss2.ResumableDownloadStore(root=Config.LOCAL_OSS_CHECKPOINT_DIR, dir='download')
+        self._retry_transfer('下载', lambda: oss2.resumable_download(
+            self.bucket, oss_path, local_path,
+            store=store,
+            multiget_threshold=Config.OSS_MULTIPART_THRESHOLD,
+            part_size=Config.OSS_MULTIPART_PART_SIZE,
+            num_threads=Config.OSS_MULTIPART_THREADS
+        ))
 
     def delete_file(self, oss_path: str):
         """删除OSS文件"""
@@ -115,10 +233,10 @@ class OSSService:
         """获取文件的公网访问URL"""
         return f"https://{Config.OSS_BUCKET_NAME}.{Config.OSS_ENDPOINT}/{oss_path}"
 
-    def get_signed_url(self, oss_path: str, expires: int = 300) -> str:
-        """获取签名URL（用于私有文件访问，百炼API需要）"""
+    def get_signed_url(self, oss_path: str, expires: int = 300, params: Optional[dict] = None) -> str:
+        """获取签名URL（用于私有文件访问，百炼API需要；params可覆盖响应头，如 response-content-disposition）"""
         # 生成签名URL，确保使用HTTPS
-        url = self.bucket.sign_url('GET', oss_path, expires, slash_safe=True)
+        url = self.bucket.sign_url('GET', oss_path, expires, params=params, slash_safe=True)
         # 确保是HTTPS
         if url.startswith('http://'):
             url = url.replace('http://', 'https://', 1)
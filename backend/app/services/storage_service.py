@@ -0,0 +1,391 @@
+import os
+import shutil
+import threading
+import oss2
+from typing import Dict, Optional, Tuple
+from ..config import Config
+from .media_cache import get_media_cache
+from .oss_service import get_oss_service
+from .write_behind import WriteBehindQueue
+
+
+# 全局单例
+_storage_instance = None
+_storage_lock = threading.Lock()
+
+
+def get_storage_service():
+    """获取存储后端单例（由 STORAGE_BACKEND 选择）"""
+    global _storage_instance
+    if _storage_instance is None:
+        with _storage_lock:
+            if _storage_instance is None:
+                _storage_instance = _create_storage()
+    return _storage_instance
+
+
+def _create_storage():
+    backend = Config.STORAGE_BACKEND
+    oss = get_oss_service() if backend != 'local' else None
+    if backend in ('oss', 'tiered') and not oss:
+        print(f"[存储] {backend} 模式需要配置OSS，改用本地存储")
+    if not oss:
+        storage = LocalStorage(Config.LOCAL_DATA_DIR)
+    elif backend == 'oss':
+        storage = OSSStorage(oss)
+    else:
+        local, remote = LocalStorage(Config.LOCAL_DATA_DIR), OSSStorage(oss)
+        write_behind = None
+        if Config.WRITE_BEHIND:
+            print("[存储] 已启用异步写回：工作流以本地为准，不检测其他实例的修改，只能用于单实例部署")
+            write_behind = WriteBehindQueue(local, remote)
+        storage = TieredStorage(local, remote, write_behind)
+    print(f"[存储] 使用存储后端: {storage.name}")
+    return storage
+
+
+def _link_or_copy(src: str, dst: str):
+    """优先硬链接（跨文件系统时退回复制）"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy(src, dst)
+
+
+class ObjectNotFoundError(Exception):
+    """对象不存在"""
+
+
+class StorageService:
+    """存储后端接口
+
+    对象以键寻址，键的目录层级与OSS一致（workflows/、images/、segments/、finals/、indexes/）。
+    oss 为后端使用的OSS服务，需要签名URL或流式读取OSS时使用，纯本地存储时为None。
+    """
+
+    name = 'base'
+    oss = None
+
+    def put_data(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        """写入对象，返回ETag"""
+        raise NotImplementedError
+
+    def get_with_etag(self, key: str) -> Tuple[bytes, str]:
+        """读取对象及其ETag，不存在时抛出 ObjectNotFoundError"""
+        raise NotImplementedError
+
+    def list_etags(self, prefix: str) -> Dict[str, str]:
+        """列举以 prefix 开头的所有对象及其ETag"""
+        raise NotImplementedError
+
+    def get_meta(self, key: str) -> Optional[dict]:
+        """获取对象元信息（etag、content_length、last_modified），不存在时返回None"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str):
+        """删除以 prefix 开头的所有对象"""
+        raise NotImplementedError
+
+    def upload_local_file(self, key: str, local_path: str):
+        """将本地文件保存为对象（文件可能被移动，调用方之后不应再使用 local_path）"""
+        raise NotImplementedError
+
+    def download_to_local(self, key: str, local_path: str):
+        """将对象保存到本地文件"""
+        raise NotImplementedError
+
+    def get_local_path(self, key: str) -> Optional[str]:
+        """返回对象可直接读取的本地文件路径，本地没有有效副本时返回None"""
+        return None
+
+    def prefetch(self, key: str):
+        """在后台将对象缓存到本地（仅分层存储有效）"""
+
+    def get_stats(self) -> dict:
+        """存储后端状态"""
+        return {"backend": self.name}
+
+    # 便捷方法
+    def get_image_path(self, workflow_id: str, segment_idx: int) -> str:
+        """生成图片存储路径"""
+        return f"{Config.OSS_IMAGE_DIR}{workflow_id}/segment_{segment_idx}.jpg"
+
+    def get_video_segment_path(self, workflow_id: str, segment_idx: int) -> str:
+        """生成视频片段存储路径"""
+        return f"{Config.OSS_VIDEO_SEGMENT_DIR}{workflow_id}/segment_{segment_idx}.mp4"
+
+    def get_final_video_path(self, workflow_id: str) -> str:
+        """生成完整视频存储路径"""
+        return f"{Config.OSS_VIDEO_FINAL_DIR}{workflow_id}.mp4"
+
+
+class LocalStorage(StorageService):
+    """本地磁盘存储（root/<key>），ETag由修改时间和大小生成"""
+
+    name = 'local'
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    @staticmethod
+    def _etag(stat: os.stat_result) -> str:
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    def put_data(self, key: str, data: bytes, content_type: Optional[str] = None, durable: bool = False) -> str:
+        """写入对象，durable=True 时返回前将文件和目录项刷到磁盘（异步写回的对象以本地为准）"""
+        # 先写临时文件再原子替换，读取方不会读到半个文件
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        if durable:
+            self._fsync_dir(os.path.dirname(path))
+        return self._etag(os.stat(path))
+
+    @staticmethod
+    def _fsync_dir(path: str):
+        # Windows不支持打开目录
+        if os.name == 'nt':
+            return
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def get_with_etag(self, key: str) -> Tuple[bytes, str]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                stat = os.fstat(f.fileno())
+                return f.read(), self._etag(stat)
+        except FileNotFoundError:
+            raise ObjectNotFoundError(key)
+
+    def list_etags(self, prefix: str) -> Dict[str, str]:
+        # 只遍历 prefix 所在目录中名称匹配的文件和子目录
+        etags = {}
+        base_dir = self._path(os.path.dirname(prefix))
+        name_prefix = os.path.basename(prefix)
+        try:
+            entries = [entry for entry in os.scandir(base_dir) if entry.name.startswith(name_prefix)]
+        except FileNotFoundError:
+            return etags
+
+        for entry in entries:
+            paths = [entry.path] if entry.is_file() else [
+                os.path.join(dirpath, filename)
+                for dirpath, _, filenames in os.walk(entry.path) for filename in filenames
+            ]
+            for path in paths:
+                if path.endswith(('.tmp', '.part')):
+                    continue
+                try:
+                    key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    etags[key] = self._etag(os.stat(path))
+                except FileNotFoundError:
+                    pass
+        return etags
+
+    def get_meta(self, key: str) -> Optional[dict]:
+        try:
+            stat = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return {
+            'last_modified': int(stat.st_mtime),
+            'content_length': stat.st_size,
+            'etag': self._etag(stat)
+        }
+
+    def delete(self, key: str):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def delete_prefix(self, prefix: str):
+        for key in self.list_etags(prefix):
+            self.delete(key)
+        if prefix.endswith('/'):
+            shutil.rmtree(self._path(prefix), ignore_errors=True)
+
+    def upload_local_file(self, key: str, local_path: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.part"
+        shutil.move(local_path, tmp_path)
+        os.replace(tmp_path, path)
+
+    def download_to_local(self, key: str, local_path: str):
+        path = self._path(key)
+        if not os.path.exists(path):
+            raise ObjectNotFoundError(key)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        _link_or_copy(path, local_path)
+
+    def get_local_path(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        return path if os.path.exists(path) else None
+
+
+class OSSStorage(StorageService):
+    """阿里云OSS存储"""
+
+    name = 'oss'
+
+    def __init__(self, oss):
+        self.oss = oss
+
+    def put_data(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        return self.oss.put_data(key, data, content_type)
+
+    def get_with_etag(self, key: str) -> Tuple[bytes, str]:
+        try:
+            return self.oss.download_file_with_etag(key)
+        except oss2.exceptions.NoSuchKey:
+            raise ObjectNotFoundError(key)
+
+    def list_etags(self, prefix: str) -> Dict[str, str]:
+        return {obj.key: obj.etag for obj in oss2.ObjectIterator(self.oss.bucket, prefix=prefix)}
+
+    def get_meta(self, key: str) -> Optional[dict]:
+        return self.oss.get_object_meta(key)
+
+    def delete(self, key: str):
+        self.oss.delete_file(key)
+
+    def delete_prefix(self, prefix: str):
+        self.oss.delete_folder(prefix)
+
+    def upload_local_file(self, key: str, local_path: str):
+        self.oss.upload_local_file(key, local_path)
+
+    def download_to_local(self, key: str, local_path: str):
+        try:
+            self.oss.download_to_local(key, local_path)
+        except oss2.exceptions.NoSuchKey:
+            raise ObjectNotFoundError(key)
+
+
+class TieredStorage(StorageService):
+    """分层存储：本地磁盘作为OSS前面的热层
+
+    写入同时落本地和OSS，OSS为准（ETag、列举、元信息都以OSS为准）；
+    媒体文件读取经本地媒体缓存（按ETag校验），OSS不可用时读取本地副本。
+
+    启用异步写回（write_behind）时，工作流和索引对象以本地为准：写入本地后即返回，
+    由写回队列合并后上传OSS；读取和列举使用本地，本地没有的对象从OSS读取后写入本地。
+    此时同一工作流只应由一个实例写入。
+    """
+
+    name = 'tiered'
+
+    # 异步写回的对象键前缀
+    WRITE_BEHIND_PREFIXES = (Config.OSS_WORKFLOW_DIR, Config.OSS_WORKFLOW_INDEX_PATH)
+
+    def __init__(self, local: LocalStorage, remote: OSSStorage, write_behind: Optional[WriteBehindQueue] = None):
+        self.local = local
+        self.remote = remote
+        self.oss = remote.oss
+        self.write_behind = write_behind
+
+    def _deferred(self, key: str) -> bool:
+        return self.write_behind is not None and key.startswith(self.WRITE_BEHIND_PREFIXES)
+
+    def put_data(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        if self._deferred(key):
+            # 本地写入落盘后才返回，写回记录在SQLite中持久化
+            etag = self.local.put_data(key, data, content_type, durable=True)
+            self.write_behind.enqueue(key, 'put', content_type)
+            return etag
+        self.local.put_data(key, data, content_type)
+        etag = self.remote.put_data(key, data, content_type)
+        if not key.startswith(self.WRITE_BEHIND_PREFIXES):
+            # 媒体文件登记到本地媒体缓存，之后读取直接命中本地副本
+            get_media_cache().register(self.oss, key, etag, len(data))
+        return etag
+
+    def get_with_etag(self, key: str) -> Tuple[bytes, str]:
+        if self._deferred(key):
+            try:
+                return self.local.get_with_etag(key)
+            except ObjectNotFoundError:
+                if self.write_behind.is_deleted(key):
+                    raise
+            # 本地没有时从OSS读取并写入本地
+            data, _ = self.remote.get_with_etag(key)
+            return data, self.local.put_data(key, data)
+
+        try:
+            return self.remote.get_with_etag(key)
+        except ObjectNotFoundError:
+            raise
+        except Exception as e:
+            if not self.local.get_local_path(key):
+                raise
+            print(f"[存储] OSS读取失败，使用本地副本 {key}: {e}")
+            return self.local.get_with_etag(key)
+
+    def list_etags(self, prefix: str) -> Dict[str, str]:
+        if self._deferred(prefix):
+            return self.local.list_etags(prefix)
+        return self.remote.list_etags(prefix)
+
+    def get_meta(self, key: str) -> Optional[dict]:
+        if self._deferred(key):
+            meta = self.local.get_meta(key)
+            if meta or self.write_behind.is_deleted(key):
+                return meta
+        return self.remote.get_meta(key)
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        if self._deferred(key):
+            self.write_behind.enqueue(key, 'delete')
+        else:
+            self.remote.delete(key)
+
+    def delete_prefix(self, prefix: str):
+        self.local.delete_prefix(prefix)
+        if self._deferred(prefix):
+            self.write_behind.enqueue(prefix, 'delete_prefix')
+        else:
+            self.remote.delete_prefix(prefix)
+
+    def upload_local_file(self, key: str, local_path: str):
+        self.remote.upload_local_file(key, local_path)
+        self.local.upload_local_file(key, local_path)
+        get_media_cache().register(self.oss, key)
+
+    def download_to_local(self, key: str, local_path: str):
+        # 本地媒体缓存命中时直接硬链接，不再下载
+        cached_path = self.get_local_path(key)
+        if cached_path:
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            _link_or_copy(cached_path, local_path)
+            return
+        self.remote.download_to_local(key, local_path)
+
+    def get_local_path(self, key: str) -> Optional[str]:
+        if self._deferred(key):
+            return self.local.get_local_path(key)
+        return get_media_cache().resolve(self.oss, key)
+
+    def prefetch(self, key: str):
+        get_media_cache().fill_async(self.oss, key)
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        if self.write_behind:
+            stats['write_behind'] = self.write_behind.get_stats()
+        return stats
@@ -0,0 +1,175 @@
+import time
+import asyncio
+import threading
+from typing import Dict, List
+from ..config import Config
+from .bailian_async_service import AsyncBailianService
+from .ingest_service import get_ingest_queue
+from .workflow_service import get_workflow_service
+
+
+# 全局单例
+_poller_instance = None
+_poller_lock = threading.Lock()
+
+
+def get_task_poller():
+    """获取视频任务轮询器单例"""
+    global _poller_instance
+    if _poller_instance is None:
+        with _poller_lock:
+            if _poller_instance is None:
+                _poller_instance = VideoTaskPoller()
+    return _poller_instance
+
+
+class _TrackedTask:
+    """轮询器内部跟踪的单个视频任务"""
+
+    def __init__(self, workflow_id: str, segment_idx: int, task_id: str):
+        self.workflow_id = workflow_id
+        self.segment_idx = segment_idx
+        self.task_id = task_id
+        self.status = None
+        self.interval = Config.POLLER_MIN_INTERVAL
+        self.next_poll_at = time.time()
+        self.started_at = time.time()
+
+
+class VideoTaskPoller:
+    """视频生成任务后台轮询器
+
+    统一持有所有未完成的 video_task_id，在一个后台线程中按自适应退避间隔
+    查询百炼任务状态并直接更新工作流，状态接口只需读取工作流中的缓存状态。
+    同一时刻到期的任务通过异步客户端在线程内的事件循环中并发查询
+    （最多 POLLER_QUERY_CONCURRENCY 个），数百个任务也只占用一个线程。
+    任务完成后片段进入 ingesting 状态，由转存队列完成下载和上传。
+    """
+
+    def __init__(self):
+        self.workflow_service = get_workflow_service()
+        self._tasks: Dict[str, _TrackedTask] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def track(self, workflow_id: str, segment_idx: int, task_id: str):
+        """登记需要跟踪的视频任务（重复登记会重置退避间隔）"""
+        with self._lock:
+            self._tasks[task_id] = _TrackedTask(workflow_id, segment_idx, task_id)
+        self._ensure_started()
+        self._wakeup.set()
+
+    def untrack(self, task_id: str):
+        """停止跟踪视频任务"""
+        with self._lock:
+            self._tasks.pop(task_id, None)
+
+    def is_tracking(self, task_id: str) -> bool:
+        with self._lock:
+            return task_id in self._tasks
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='video-task-poller', daemon=True)
+            self._thread.start()
+            print("[轮询] 后台轮询线程已启动")
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        client = AsyncBailianService()
+        try:
+            while True:
+                now = time.time()
+                with self._lock:
+                    due = [t for t in self._tasks.values() if t.next_poll_at <= now]
+                    upcoming = [t.next_poll_at for t in self._tasks.values() if t.next_poll_at > now]
+
+                if due:
+                    self._poll_all(loop, client, due)
+                    continue
+
+                timeout = max(min(upcoming) - time.time(), 0) if upcoming else None
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+        finally:
+            loop.run_until_complete(client.aclose())
+            loop.close()
+
+    def _poll_all(self, loop: asyncio.AbstractEventLoop, client: AsyncBailianService, tasks: List[_TrackedTask]):
+        """并发查询到期任务，再依次处理结果"""
+        active = []
+        for task in tasks:
+            if time.time() - task.started_at <= Config.POLLER_TASK_TIMEOUT:
+                active.append(task)
+                continue
+            print(f"[轮询] 任务超时: {task.task_id}")
+            try:
+                self._finish(task, {"video_status": "failed", "video_error": "视频生成超时"})
+            except Exception as e:
+                print(f"[轮询] 处理任务异常 {task.task_id}: {e}")
+                self.untrack(task.task_id)
+
+        semaphore = asyncio.Semaphore(Config.POLLER_QUERY_CONCURRENCY)
+
+        async def query(task: _TrackedTask) -> dict:
+            async with semaphore:
+                return await client.query_video_task(task.task_id)
+
+        async def query_all():
+            return await asyncio.gather(*(query(task) for task in active), return_exceptions=True)
+
+        results = loop.run_until_complete(query_all()) if active else []
+        # 查询失败（限流、网络错误等）不改变任务状态，继续跟踪并退避后重新查询
+        for task, result in zip(active, results):
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                self._handle_result(task, result)
+            except Exception as e:
+                print(f"[轮询] 处理任务异常 {task.task_id}: {e}")
+                task.interval = min(task.interval * Config.POLLER_BACKOFF_FACTOR, Config.POLLER_MAX_INTERVAL)
+                task.next_poll_at = time.time() + task.interval
+
+    def _handle_result(self, task: _TrackedTask, result: dict):
+        """处理单个任务的查询结果，状态变化时写回工作流"""
+        status = result['status']
+
+        if status == 'failed':
+            self._finish(task, {"video_status": "failed", "video_error": result.get('error')})
+            return
+
+        if status == 'completed':
+            # 转存交给后台转存队列，轮询线程不被下载/上传阻塞
+            if not result.get('video_url'):
+                self._finish(task, {"video_status": "failed", "video_error": "未返回视频URL"})
+            elif self._apply(task, {"video_status": "ingesting", "video_error": None}):
+                get_ingest_queue().enqueue(task.workflow_id, task.segment_idx, task.task_id, result['video_url'])
+            self.untrack(task.task_id)
+            return
+
+        if status != task.status:
+            # 状态变化：写回工作流并重置轮询间隔
+            task.status = status
+            task.interval = Config.POLLER_MIN_INTERVAL
+            self._apply(task, {"video_status": status})
+        else:
+            task.interval = min(task.interval * Config.POLLER_BACKOFF_FACTOR, Config.POLLER_MAX_INTERVAL)
+        task.next_poll_at = time.time() + task.interval
+
+    def _finish(self, task: _TrackedTask, updates: dict):
+        self._apply(task, updates)
+        self.untrack(task.task_id)
+
+    def _apply(self, task: _TrackedTask, updates: dict) -> bool:
+        """将片段状态写回工作流（任务已被替换时停止跟踪）"""
+        applied = self.workflow_service.update_task_segment(
+            task.workflow_id, task.segment_idx, task.task_id, updates
+        )
+        if not applied:
+            self.untrack(task.task_id)
+        return applied
@@ -1,17 +1,39 @@
 import os
+import json
+import shutil
+import hashlib
 import subprocess
 import tempfile
-import requests
-from typing import List
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+from ..config import Config
+from ..utils.http import get_http_session
+
+
+# 流参数探测缓存（按片段/块的内容标识，进程内共享）
+_probe_cache = OrderedDict()
+_probe_cache_lock = threading.Lock()
+PROBE_CACHE_SIZE = 1024
+
+# 重新编码时使用的编码器
+VIDEO_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+AUDIO_ENCODERS = {'aac': 'aac', 'mp3': 'libmp3lame', 'opus': 'libopus'}
 
 
 class VideoService:
     """视频处理服务"""
 
+    @staticmethod
+    def get_merge_signature(segment_keys: List[str]) -> str:
+        """根据片段内容标识（如OSS ETag）计算合成签名，签名相同说明输入未变化"""
+        return hashlib.sha1('\n'.join(segment_keys).encode('utf-8')).hexdigest()
+
     def download_video(self, url: str, save_path: str) -> bool:
         """从URL下载视频"""
         try:
-            response = requests.get(url, stream=True, timeout=300)
+            response = get_http_session().get(url, stream=True, timeout=(Config.HTTP_CONNECT_TIMEOUT, 300))
             response.raise_for_status()
             
             os.makedirs(os.path.dirname(save_path), exist_ok=True)
@@ -24,8 +46,172 @@ class VideoService:
             print(f"下载视频失败: {e}")
             return False
 
-    def merge_videos(self, video_files: List[str], output_path: str) -> bool:
-        """使用ffmpeg合成多个视频片段"""
+    def get_duration(self, video_file: str) -> Optional[float]:
+        """使用ffprobe获取视频时长（秒），失败返回None"""
+        try:
+            result = subprocess.run(
+                [
+                    'ffprobe', '-v', 'error',
+                    '-show_entries', 'format=duration',
+                    '-of', 'default=noprint_wrappers=1:nokey=1',
+                    video_file
+                ],
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+            return float(result.stdout.strip())
+        except Exception:
+            return None
+
+    def probe_streams(self, video_file: str, cache_key: Optional[str] = None) -> Optional[dict]:
+        """使用ffprobe获取影响流复制拼接的参数，失败返回None
+
+        cache_key 为文件的内容标识（如片段的OSS ETag、块的签名），未指定时使用路径、大小和修改时间，
+        不读取文件内容。返回 {"video": {...}, "audio": {...} 或 None}，两个文件的结果相等即可直接 -c copy 拼接。
+        """
+        if cache_key is None:
+            try:
+                stat = os.stat(video_file)
+            except OSError:
+                return None
+            cache_key = f"file:{video_file}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        with _probe_cache_lock:
+            if cache_key in _probe_cache:
+                _probe_cache.move_to_end(cache_key)
+                return _probe_cache[cache_key]
+
+        try:
+            result = subprocess.run(
+                [
+                    'ffprobe', '-v', 'error',
+                    '-show_entries',
+                    'stream=codec_type,codec_name,profile,width,height,pix_fmt,r_frame_rate,time_base,sample_rate,channels',
+                    '-of', 'json',
+                    video_file
+                ],
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+            streams = json.loads(result.stdout).get('streams', [])
+        except Exception as e:
+            print(f"探测视频参数失败 {video_file}: {e}")
+            return None
+
+        video = next((st for st in streams if st.get('codec_type') == 'video'), None)
+        if not video:
+            return None
+        audio = next((st for st in streams if st.get('codec_type') == 'audio'), None)
+        profile = {
+            "video": {
+                key: video.get(key)
+                for key in ('codec_name', 'profile', 'width', 'height', 'pix_fmt', 'r_frame_rate', 'time_base')
+            },
+            "audio": {
+                key: audio.get(key)
+                for key in ('codec_name', 'sample_rate', 'channels')
+            } if audio else None
+        }
+
+        with _probe_cache_lock:
+            _probe_cache[cache_key] = profile
+            while len(_probe_cache) > PROBE_CACHE_SIZE:
+                _probe_cache.popitem(last=False)
+        return profile
+
+    def normalize_for_concat(self, video_files: List[str], work_dir: str,
+                             weights: Optional[List[int]] = None,
+                             cache_keys: Optional[List[str]] = None) -> Optional[List[str]]:
+        """保证文件可以 -c copy 拼接
+
+        参数全部一致时原样返回；否则以占多数（按weights加权）的参数为目标，
+        只将不一致的文件并发重新编码到目标参数，按顺序返回可拼接的文件路径。
+        cache_keys 为各文件的内容标识，用作探测缓存的键。重新编码失败返回None。
+        """
+        profiles = [
+            self.probe_streams(video_file, cache_key)
+            for video_file, cache_key in zip(video_files, cache_keys or [None] * len(video_files))
+        ]
+        keys = [json.dumps(profile, sort_keys=True) if profile else None for profile in profiles]
+
+        # 探测失败的文件不参与判断，保持原样
+        counts = Counter()
+        for key, weight in zip(keys, weights or [1] * len(video_files)):
+            if key:
+                counts[key] += weight
+        if len(counts) <= 1:
+            return list(video_files)
+
+        target_key = counts.most_common(1)[0][0]
+        target = json.loads(target_key)
+        mismatched = [i for i, key in enumerate(keys) if key and key != target_key]
+        print(f"[合成] {len(mismatched)} 个文件参数不一致，重新编码为 "
+              f"{target['video']['width']}x{target['video']['height']} {target['video']['codec_name']}")
+
+        outputs = list(video_files)
+        with ThreadPoolExecutor(max_workers=Config.MERGE_NORMALIZE_WORKERS) as executor:
+            futures = {
+                i: executor.submit(
+                    self._reencode, video_files[i], profiles[i],
+                    os.path.join(work_dir, f'normalized_{i}.mp4'), target
+                )
+                for i in mismatched
+            }
+            for i, future in futures.items():
+                if not future.result():
+                    return None
+                outputs[i] = os.path.join(work_dir, f'normalized_{i}.mp4')
+        return outputs
+
+    def _reencode(self, input_path: str, profile: dict, output_path: str, target: dict) -> bool:
+        """将视频重新编码到目标参数（分辨率不同时等比缩放并补边，缺少音轨时补静音）"""
+        video, audio = target['video'], target['audio']
+        width, height = video['width'], video['height']
+        cmd = ['ffmpeg', '-y', '-i', input_path]
+        if audio and not profile['audio']:
+            layout = 'mono' if audio['channels'] == 1 else 'stereo'
+            cmd += ['-f', 'lavfi', '-i', f"anullsrc=r={audio['sample_rate']}:cl={layout}"]
+
+        cmd += [
+            '-map', '0:v:0',
+            '-vf', (
+                f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+                f"fps={video['r_frame_rate']},format={video['pix_fmt']}"
+            ),
+            '-c:v', VIDEO_ENCODERS.get(video['codec_name'], 'libx264'),
+            '-preset', 'veryfast',
+            '-crf', '18'
+        ]
+        if (video.get('time_base') or '').startswith('1/'):
+            cmd += ['-video_track_timescale', video['time_base'][2:]]
+
+        if audio:
+            cmd += ['-map', '1:a:0', '-shortest'] if not profile['audio'] else ['-map', '0:a:0']
+            cmd += [
+                '-c:a', AUDIO_ENCODERS.get(audio['codec_name'], 'aac'),
+                '-ar', str(audio['sample_rate']),
+                '-ac', str(audio['channels'])
+            ]
+        else:
+            cmd += ['-an']
+        cmd.append(output_path)
+
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=Config.MERGE_TIMEOUT)
+            if result.returncode != 0:
+                print(f"ffmpeg重新编码错误: {result.stderr}")
+                return False
+            return os.path.exists(output_path)
+        except Exception as e:
+            print(f"视频重新编码失败: {e}")
+            return False
+
+    def merge_videos(self, video_files: List[str], output_path: str,
+                     progress_callback: Optional[Callable[[float], None]] = None) -> bool:
+        """使用ffmpeg合成多个视频片段，progress_callback 接收 0~1 的合成进度"""
         if not video_files:
             return False
 
@@ -37,11 +223,17 @@ class VideoService:
                 safe_path = video_file.replace('\\', '/')
                 f.write(f"file '{safe_path}'\n")
 
+        # 总时长用于计算进度，获取失败时按配置的片段时长估算
+        total_duration = 0.0
+        if progress_callback:
+            for video_file in video_files:
+                total_duration += self.get_duration(video_file) or Config.VIDEO_DURATION
+
         try:
             # 确保输出目录存在
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-            # 执行ffmpeg命令
+            # 执行ffmpeg命令，进度以 key=value 形式输出到stdout
             cmd = [
                 'ffmpeg',
                 '-y',  # 覆盖输出文件
@@ -49,25 +241,47 @@ class VideoService:
                 '-safe', '0',
                 '-i', concat_file,
                 '-c', 'copy',  # 直接复制流，不重新编码
+                '-progress', 'pipe:1',
+                '-nostats',
                 output_path
             ]
 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
+            with tempfile.TemporaryFile(mode='w+') as stderr_file:
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file, text=True)
+                timed_out = threading.Event()
 
-            if result.returncode != 0:
-                print(f"ffmpeg错误: {result.stderr}")
-                return False
+                def kill():
+                    timed_out.set()
+                    process.kill()
+
+                timer = threading.Timer(Config.MERGE_TIMEOUT, kill)
+                timer.start()
+                try:
+                    for line in process.stdout:
+                        key, _, value = line.strip().partition('=')
+                        # out_time_ms 在旧版ffmpeg中同样以微秒为单位
+                        if key in ('out_time_us', 'out_time_ms') and progress_callback and total_duration > 0:
+                            try:
+                                progress_callback(min(int(value) / 1e6 / total_duration, 1.0))
+                            except ValueError:
+                                pass
+                    returncode = process.wait()
+                finally:
+                    timer.cancel()
+                    if process.poll() is None:
+                        process.kill()
+
+                if timed_out.is_set():
+                    print("视频合成超时")
+                    return False
+
+                if returncode != 0:
+                    stderr_file.seek(0)
+                    print(f"ffmpeg错误: {stderr_file.read()}")
+                    return False
 
             return os.path.exists(output_path)
 
-        except subprocess.TimeoutExpired:
-            print("视频合成超时")
-            return False
         except Exception as e:
             print(f"视频合成失败: {e}")
             return False
@@ -76,6 +290,96 @@ class VideoService:
             if os.path.exists(concat_file):
                 os.remove(concat_file)
 
+    def merge_incremental(self, workflow_id: str, segment_keys: List[str],
+                          fetch_segments: Callable[[List[int], str], List[str]], output_path: str,
+                          progress_callback: Optional[Callable[[float], None]] = None) -> bool:
+        """分块增量合成
+
+        片段按 MERGE_CHUNK_SIZE 分块，每块先合成为中间文件并按块内片段标识的哈希缓存在
+        LOCAL_MERGE_CACHE_DIR/<workflow_id> 下；再次合成时只重新获取和合成内容变化的块，
+        最后将各块拼接为完整视频。fetch_segments(indexes, dir) 负责把指定片段下载到dir，
+        按顺序返回文件路径。
+        """
+        if not segment_keys:
+            return False
+
+        cache_dir = os.path.join(Config.LOCAL_MERGE_CACHE_DIR, workflow_id)
+        os.makedirs(cache_dir, exist_ok=True)
+
+        chunk_size = max(Config.MERGE_CHUNK_SIZE, 1)
+        chunks = []
+        for start in range(0, len(segment_keys), chunk_size):
+            indexes = list(range(start, min(start + chunk_size, len(segment_keys))))
+            chunk_key = self.get_merge_signature([segment_keys[i] for i in indexes])
+            chunks.append((indexes, os.path.join(cache_dir, f'chunk_{chunk_key}.mp4')))
+
+        missing = [chunk for chunk in chunks if not os.path.exists(chunk[1])]
+        print(f"[合成] 共 {len(chunks)} 块，需重新合成 {len(missing)} 块")
+
+        # 进度：重建的块占前80%，最后拼接占剩余部分（没有需要重建的块时拼接占全部）
+        build_weight = 0.8 if missing else 0.0
+
+        def report(progress: float):
+            if progress_callback:
+                progress_callback(min(progress, 1.0))
+
+        if missing:
+            temp_dir = tempfile.mkdtemp(dir=cache_dir)
+            try:
+                # 一次性并发获取所有需要重建的块中的片段
+                indexes = [i for chunk_indexes, _ in missing for i in chunk_indexes]
+                files = dict(zip(indexes, fetch_segments(indexes, temp_dir)))
+
+                for done, (chunk_indexes, chunk_path) in enumerate(missing):
+                    tmp_chunk = os.path.join(temp_dir, f'chunk_{done}.mp4')
+                    chunk_files = self.normalize_for_concat(
+                        [files[i] for i in chunk_indexes], temp_dir,
+                        cache_keys=[segment_keys[i] for i in chunk_indexes]
+                    )
+                    if not chunk_files or not self.merge_videos(chunk_files, tmp_chunk):
+                        return False
+                    os.replace(tmp_chunk, chunk_path)
+                    report(build_weight * (done + 1) / len(missing))
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        # 清理不再使用的块
+        used = {os.path.basename(chunk_path) for _, chunk_path in chunks}
+        for filename in os.listdir(cache_dir):
+            if filename.startswith('chunk_') and filename not in used:
+                try:
+                    os.remove(os.path.join(cache_dir, filename))
+                except OSError:
+                    pass
+
+        chunk_files = [chunk_path for _, chunk_path in chunks]
+        if len(chunk_files) == 1:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            shutil.copy(chunk_files[0], output_path)
+            report(1.0)
+            return True
+
+        # 各块分别合成，块之间参数也可能不一致（如部分块在修改分辨率后重建）
+        temp_dir = tempfile.mkdtemp(dir=cache_dir)
+        try:
+            # 块文件名包含块内片段标识的哈希，可直接作为内容标识
+            chunk_files = self.normalize_for_concat(
+                chunk_files, temp_dir, weights=[len(indexes) for indexes, _ in chunks],
+                cache_keys=[f"chunk:{os.path.basename(chunk_path)}" for chunk_path in chunk_files]
+            )
+            if not chunk_files:
+                return False
+            return self.merge_videos(
+                chunk_files, output_path,
+                lambda p: report(build_weight + (1 - build_weight) * p)
+            )
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def clear_merge_cache(self, workflow_id: str):
+        """删除工作流的分块合成缓存"""
+        shutil.rmtree(os.path.join(Config.LOCAL_MERGE_CACHE_DIR, workflow_id), ignore_errors=True)
+
     def cleanup_temp_files(self, file_paths: List[str]):
         """清理临时文件"""
         for path in file_paths:
@@ -1,24 +1,80 @@
 import uuid
-import json
-import os
+import copy
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from ..config import Config
-from .oss_service import get_oss_service
+from ..utils.http import get_backoff_delay
+from ..utils.serialization import encode_document, decode_document
+from .event_bus import get_event_bus
+from .storage_service import get_storage_service, ObjectNotFoundError
+
+
+# 全局单例
+_workflow_service_instance = None
+_workflow_service_lock = threading.Lock()
+
+
+def get_workflow_service():
+    """获取工作流服务单例（共享同一份工作流缓存）"""
+    global _workflow_service_instance
+    if _workflow_service_instance is None:
+        with _workflow_service_lock:
+            if _workflow_service_instance is None:
+                _workflow_service_instance = WorkflowService()
+    return _workflow_service_instance
+
+
+class WorkflowConflictError(Exception):
+    """工作流已被其他写入方修改（版本或ETag不一致）"""
 
 
 class WorkflowService:
-    """工作流管理服务"""
+    """工作流管理服务
 
-    def __init__(self):
-        self.workflow_dir = Config.LOCAL_WORKFLOW_DIR
+    工作流存储在存储后端（OSS、本地磁盘或分层存储）中，按对象分开保存：头部（除片段外的字段及
+    segment_count）保存在 workflows/<id>.json，每个片段保存在 workflows/<id>/segment_<idx>.json，
+    读取时组装成完整文档。保存时只写入有变化的对象，单个片段的更新不会重写整个工作流。
+    旧版（片段内嵌在头部中）的工作流可以直接读取，下次保存时转换为新格式。
+    对象内容按 WORKFLOW_SERIALIZATION 序列化（键名保留 .json 后缀），读取时按内容识别格式。
+
+    所有修改都是原子的读-改-写：同一进程内由分段锁串行化，写入前比对存储中各对象的ETag，
+    被其他实例修改过时退避后重新读取并重放修改（最多 WORKFLOW_SAVE_RETRIES 次）。
+    每次有写入的保存（包括只修改片段）都会更新头部的 updated_at 并递增 version，客户端可据此做乐观并发控制。
+    """
+
+    # 工作流锁分段数（同一工作流的读-改-写串行执行）
+    LOCK_STRIPES = 64
 
-    def _get_workflow_path(self, workflow_id: str) -> str:
-        return os.path.join(self.workflow_dir, f"{workflow_id}.json")
+    def __init__(self):
+        # 工作流缓存：workflow_id -> {"workflow", "etags", "verified_at"}，按LRU淘汰
+        # etags 记录组成工作流的每个存储对象的ETag，用于校验缓存
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._workflow_locks = [threading.RLock() for _ in range(self.LOCK_STRIPES)]
+        # 工作流列表索引：workflow_id -> 摘要，持久化为单个存储对象
+        self._index = None
+        self._index_etag = None
+        self._index_verified_at = 0
+        self._index_lock = threading.Lock()
+        # 尚未写入存储的索引变更：workflow_id -> 摘要（None 表示已删除），写入前与存储中的索引合并
+        self._index_pending = {}
+        self._index_timer = None
+        atexit.register(self.flush_index)
 
-    def _get_oss_workflow_path(self, workflow_id: str) -> str:
+    def _get_workflow_key(self, workflow_id: str) -> str:
         return f"{Config.OSS_WORKFLOW_DIR}{workflow_id}.json"
 
+    def _get_segment_key(self, workflow_id: str, idx: int) -> str:
+        return f"{Config.OSS_WORKFLOW_DIR}{workflow_id}/segment_{idx}.json"
+
+    def _workflow_lock(self, workflow_id: str) -> threading.RLock:
+        return self._workflow_locks[hash(workflow_id) % self.LOCK_STRIPES]
+
     def create_workflow(self, name: Optional[str] = None) -> dict:
         """创建新工作流"""
         workflow_id = str(uuid.uuid4())
@@ -32,112 +88,442 @@ class WorkflowService:
             "original_text": "",
             "segments": [],
             "final_video_url": None,
-            "status": "draft"
+            "status": "draft",
+            "version": 0
         }
 
         self._save_workflow(workflow)
         return workflow
 
     def get_workflow(self, workflow_id: str) -> Optional[dict]:
-        """获取工作流详情（从OSS获取）"""
-        oss = get_oss_service()
-        if oss:
+        """获取工作流详情（优先读缓存，未命中时从存储读取）"""
+        loaded = self._read_workflow(workflow_id)
+        return loaded[0] if loaded else None
+
+    def _read_workflow(self, workflow_id: str) -> Optional[Tuple[dict, Dict[str, str]]]:
+        """读取工作流副本及其各对象ETag"""
+        storage = get_storage_service()
+        entry = self._cache_get(workflow_id)
+        if entry:
+            if time.time() - entry['verified_at'] < Config.WORKFLOW_CACHE_TTL:
+                return copy.deepcopy(entry['workflow']), dict(entry['etags'])
+            # 缓存过期：一次列举比对所有对象的ETag，未变化则无需重新下载
             try:
-                oss_path = self._get_oss_workflow_path(workflow_id)
-                data = oss.download_file(oss_path)
-                workflow = json.loads(data.decode('utf-8'))
-                return workflow
+                if self._list_etags(storage, workflow_id) == entry['etags']:
+                    self._cache_put(workflow_id, entry['workflow'], entry['etags'])
+                    return copy.deepcopy(entry['workflow']), dict(entry['etags'])
             except Exception as e:
-                print(f"从OSS获取工作流失败: {e}")
+                print(f"列举工作流对象失败: {e}")
+            self._cache_invalidate(workflow_id)
+
+        try:
+            workflow, etags = self._load_workflow(storage, workflow_id)
+            self._cache_put(workflow_id, workflow, etags)
+            return copy.deepcopy(workflow), dict(etags)
+        except ObjectNotFoundError:
+            pass
+        except Exception as e:
+            print(f"读取工作流失败: {e}")
         
         return None
 
-    def update_workflow(self, workflow_id: str, data: dict) -> Optional[dict]:
-        """更新工作流"""
-        workflow = self.get_workflow(workflow_id)
-        if not workflow:
+    def _load_workflow(self, storage, workflow_id: str) -> Tuple[dict, Dict[str, str]]:
+        """读取头部和所有片段并组装，返回 (工作流, 各对象ETag)"""
+        header_path = self._get_workflow_key(workflow_id)
+        data, etag = storage.get_with_etag(header_path)
+        workflow = decode_document(data)
+        etags = {header_path: etag}
+
+        if 'segments' not in workflow:
+            count = workflow.pop('segment_count', 0)
+            paths = [self._get_segment_key(workflow_id, idx) for idx in range(count)]
+            with ThreadPoolExecutor(max_workers=min(max(count, 1), Config.WORKFLOW_LOAD_WORKERS)) as executor:
+                results = list(executor.map(storage.get_with_etag, paths))
+            workflow['segments'] = [decode_document(data) for data, _ in results]
+            etags.update({path: etag for path, (_, etag) in zip(paths, results)})
+        return workflow, etags
+
+    def _list_etags(self, storage, workflow_id: str) -> Dict[str, str]:
+        """列举组成工作流的所有对象（头部和片段）的ETag"""
+        prefix = f"{Config.OSS_WORKFLOW_DIR}{workflow_id}"
+        return {
+            key: etag for key, etag in storage.list_etags(prefix).items()
+            if key == f"{prefix}.json" or key.startswith(f"{prefix}/")
+        }
+
+    def modify_workflow(self, workflow_id: str, mutate: Callable[[dict], Optional[bool]]) -> Optional[dict]:
+        """原子地修改工作流：读取最新版本后调用 mutate 原地修改并保存
+
+        保存冲突时按抖动指数退避后重新读取并再次调用 mutate，因此 mutate 应只依赖传入的工作流。
+        mutate 返回False时放弃修改。返回保存后的工作流，工作流不存在或放弃修改时返回None。
+        """
+        for attempt in range(1, Config.WORKFLOW_SAVE_RETRIES + 1):
+            with self._workflow_lock(workflow_id):
+                loaded = self._read_workflow(workflow_id)
+                if not loaded:
+                    return None
+                workflow, etags = loaded
+                previous = copy.deepcopy(workflow)
+                if mutate(workflow) is False:
+                    return None
+                try:
+                    self._save_workflow(workflow, previous, etags)
+                    return workflow
+                except WorkflowConflictError:
+                    self._cache_invalidate(workflow_id)
+                    if attempt == Config.WORKFLOW_SAVE_RETRIES:
+                        raise
+            # 释放锁后按抖动指数退避，避免多个实例同时重试再次冲突
+            delay = get_backoff_delay(attempt, Config.WORKFLOW_SAVE_RETRY_INTERVAL)
+            print(f"[工作流] 保存冲突，{delay:.2f}秒后重新读取并重试 ({attempt}): {workflow_id}")
+            time.sleep(delay)
+
+    def update_workflow(self, workflow_id: str, data: dict,
+                        expected_version: Optional[int] = None) -> Optional[dict]:
+        """更新工作流（传入 segments 时整体替换片段列表，只写入有变化的片段）
+
+        指定 expected_version 时，当前版本不一致则抛出 WorkflowConflictError。
+        """
+        def mutate(workflow: dict):
+            if expected_version is not None and workflow.get('version', 0) != expected_version:
+                raise WorkflowConflictError(f"工作流已被修改（当前版本 {workflow.get('version', 0)}）")
+
+            # 更新允许的字段（没有字段变化时不写入）
+            allowed_fields = ['name', 'original_text', 'segments', 'final_video_url', 'status']
+            for field in allowed_fields:
+                if field in data:
+                    workflow[field] = data[field]
+
+        return self.modify_workflow(workflow_id, mutate)
+
+    def update_segments(self, workflow_id: str, updates: Dict[int, dict],
+                        workflow_fields: Optional[dict] = None) -> Optional[dict]:
+        """按片段合并更新字段，只写入被修改的片段对象
+
+        workflow_fields 为同时需要更新的工作流字段（如 status）。
+        返回更新后的工作流，工作流不存在时返回None。
+        """
+        def mutate(workflow: dict):
+            segments = workflow.get('segments', [])
+            for idx, fields in updates.items():
+                if 0 <= idx < len(segments):
+                    segments[idx].update(fields)
+            if workflow_fields:
+                workflow.update(workflow_fields)
+
+        return self.modify_workflow(workflow_id, mutate)
+
+    def update_segment(self, workflow_id: str, idx: int, fields: dict) -> Optional[dict]:
+        """更新单个片段的字段，返回更新后的片段（工作流或片段不存在时返回None）"""
+        workflow = self.update_segments(workflow_id, {idx: fields})
+        if not workflow or idx >= len(workflow.get('segments', [])):
             return None
+        return workflow['segments'][idx]
 
-        # 更新允许的字段
-        allowed_fields = ['name', 'original_text', 'segments', 'final_video_url', 'status']
-        for field in allowed_fields:
-            if field in data:
-                workflow[field] = data[field]
+    def update_task_segment(self, workflow_id: str, segment_idx: int, task_id: str, updates: dict) -> bool:
+        """按视频任务更新片段状态并推送事件，片段已提交新任务时忽略并返回False"""
+        def mutate(workflow: dict):
+            segments = workflow.get('segments', [])
+            if segment_idx >= len(segments) or segments[segment_idx].get('video_task_id') != task_id:
+                return False
+            segments[segment_idx].update(updates)
 
-        workflow['updated_at'] = datetime.now().isoformat()
-        self._save_workflow(workflow)
-        return workflow
+        workflow = self.modify_workflow(workflow_id, mutate)
+        if not workflow:
+            return False
+
+        segment = workflow['segments'][segment_idx]
+        get_event_bus().publish(workflow_id, 'segment_status', {
+            "index": segment_idx,
+            "status": segment.get('video_status'),
+            "video_url": segment.get('video_url'),
+            "error": segment.get('video_error')
+        })
+        return True
 
     def delete_workflow(self, workflow_id: str) -> bool:
-        """删除工作流"""
-        deleted = False
-        
-        # 删除本地文件
-        path = self._get_workflow_path(workflow_id)
-        if os.path.exists(path):
-            os.remove(path)
-            deleted = True
-        
-        # 删除OSS文件
-        oss = get_oss_service()
-        if oss:
-            try:
-                oss_path = self._get_oss_workflow_path(workflow_id)
-                oss.delete_file(oss_path)
-                deleted = True
-            except Exception:
-                pass
-        
-        return deleted
+        """删除工作流，工作流不存在时返回False
 
-    def list_workflows(self) -> List[dict]:
-        """列出所有工作流（从OSS获取）"""
-        workflows = []
-        
-        oss = get_oss_service()
-        if oss:
+        先删除片段再删除头部，删除失败时抛出异常并保留索引条目，可再次调用重试。
+        """
+        storage = get_storage_service()
+        key = self._get_workflow_key(workflow_id)
+        with self._workflow_lock(workflow_id):
+            if not storage.get_meta(key):
+                return False
+
+            self._cache_invalidate(workflow_id)
             try:
-                import oss2
-                # 遍历OSS中的工作流文件
-                prefix = Config.OSS_WORKFLOW_DIR
-                for obj in oss2.ObjectIterator(oss.bucket, prefix=prefix):
-                    if obj.key.endswith('.json'):
-                        try:
-                            data = oss.download_file(obj.key)
-                            workflow = json.loads(data.decode('utf-8'))
-                            workflows.append({
-                                "id": workflow["id"],
-                                "name": workflow["name"],
-                                "created_at": workflow["created_at"],
-                                "status": workflow.get("status", "draft"),
-                                "segment_count": len(workflow.get("segments", []))
-                            })
-                        except Exception as e:
-                            print(f"读取工作流失败 {obj.key}: {e}")
+                storage.delete_prefix(f"{Config.OSS_WORKFLOW_DIR}{workflow_id}/")
+                storage.delete(key)
             except Exception as e:
-                print(f"从OSS获取工作流列表失败: {e}")
+                print(f"删除工作流失败: {e}")
+                raise
+        self._index_remove(workflow_id)
+        return True
+
+    def list_workflows(self, status: Optional[str] = None, since: Optional[str] = None,
+                       offset: int = 0, limit: Optional[int] = None) -> Tuple[List[dict], int]:
+        """列出工作流摘要（读取工作流索引），返回 (当前页, 过滤后总数)"""
+        with self._index_lock:
+            index = self._load_index()
+            workflows = list(index.values()) if index else []
+
+        if status:
+            workflows = [w for w in workflows if w.get("status") == status]
+        if since:
+            # ISO格式时间可直接按字符串比较
+            workflows = [w for w in workflows if (w.get("updated_at") or w["created_at"]) >= since]
 
         # 按创建时间降序排序
         workflows.sort(key=lambda x: x["created_at"], reverse=True)
-        return workflows
+        total = len(workflows)
+        end = offset + limit if limit is not None else None
+        return workflows[offset:end], total
 
-    def _save_workflow(self, workflow: dict):
-        """保存工作流到本地和OSS"""
-        # 保存到本地
-        self._save_local(workflow)
-        
-        # 上传到OSS
-        oss = get_oss_service()
-        if oss:
-            try:
-                oss_path = self._get_oss_workflow_path(workflow["id"])
-                data = json.dumps(workflow, ensure_ascii=False, indent=2).encode('utf-8')
-                oss.upload_file(oss_path, data, 'application/json')
-            except Exception as e:
-                print(f"上传工作流到OSS失败: {e}")
+    @staticmethod
+    def _summarize(workflow: dict) -> dict:
+        """生成工作流列表摘要"""
+        return {
+            "id": workflow["id"],
+            "name": workflow["name"],
+            "created_at": workflow["created_at"],
+            "updated_at": workflow.get("updated_at"),
+            "status": workflow.get("status", "draft"),
+            "segment_count": workflow.get("segment_count", len(workflow.get("segments", [])))
+        }
+
+    def _load_index(self) -> Optional[dict]:
+        """加载工作流索引（需持有 _index_lock），索引不存在时全量扫描重建"""
+        storage = get_storage_service()
+        if self._index is not None:
+            if time.time() - self._index_verified_at < Config.WORKFLOW_CACHE_TTL:
+                return self._index
+            # 内存副本过期：ETag未变化则继续使用
+            meta = storage.get_meta(Config.OSS_WORKFLOW_INDEX_PATH)
+            if meta and meta['etag'] == self._index_etag:
+                self._index_verified_at = time.time()
+                return self._index
+
+        try:
+            self._reload_index(storage)
+        except ObjectNotFoundError:
+            print("[索引] 工作流索引不存在，开始全量重建")
+            self._index = self._rebuild_index(storage)
+            self._apply_index_pending()
+            self._upload_index(storage)
+        except Exception as e:
+            print(f"读取工作流索引失败: {e}")
+        return self._index
+
+    def _reload_index(self, storage):
+        """从存储读取索引并重放本实例尚未写入的变更（需持有 _index_lock）"""
+        data, etag = storage.get_with_etag(Config.OSS_WORKFLOW_INDEX_PATH)
+        self._index = decode_document(data)["workflows"]
+        self._index_etag = etag
+        self._index_verified_at = time.time()
+        self._apply_index_pending()
+
+    def _apply_index_pending(self):
+        for workflow_id, summary in self._index_pending.items():
+            if summary is None:
+                self._index.pop(workflow_id, None)
+                continue
+            # 存储中的摘要更新（其他实例之后又保存过）时保留
+            current = self._index.get(workflow_id)
+            if current and (current.get("updated_at") or "") > (summary.get("updated_at") or ""):
+                continue
+            self._index[workflow_id] = summary
+
+    def _rebuild_index(self, storage) -> dict:
+        """遍历存储中的工作流头部文件重建索引"""
+        index = {}
+        try:
+            for key in storage.list_etags(Config.OSS_WORKFLOW_DIR):
+                # 跳过 workflows/<id>/ 下的片段对象
+                if key.endswith('.json') and '/' not in key[len(Config.OSS_WORKFLOW_DIR):]:
+                    try:
+                        data, _ = storage.get_with_etag(key)
+                        workflow = decode_document(data)
+                        index[workflow["id"]] = self._summarize(workflow)
+                    except Exception as e:
+                        print(f"读取工作流失败 {key}: {e}")
+        except Exception as e:
+            print(f"获取工作流列表失败: {e}")
+        return index
+
+    def _upload_index(self, storage) -> bool:
+        """上传工作流索引（需持有 _index_lock），成功后清空待写入的变更"""
+        try:
+            data, content_type = encode_document({"workflows": self._index})
+            self._index_etag = storage.put_data(Config.OSS_WORKFLOW_INDEX_PATH, data, content_type)
+            self._index_verified_at = time.time()
+            self._index_pending.clear()
+            return True
+        except Exception as e:
+            # 下次读取时重新从存储加载
+            self._index_verified_at = 0
+            print(f"上传工作流索引失败: {e}")
+            return False
+
+    def _flush_index(self, storage):
+        """写入待写入的索引变更（需持有 _index_lock）
+
+        OSS不支持条件写入：写入前比对索引ETag，被其他实例修改过时先重新读取并合并本实例的变更，
+        避免覆盖其他实例写入的条目。写入失败时稍后重试。
+        """
+        if not self._index_pending or self._index is None:
+            return
+        try:
+            meta = storage.get_meta(Config.OSS_WORKFLOW_INDEX_PATH)
+            if meta and meta['etag'] != self._index_etag:
+                self._reload_index(storage)
+        except Exception as e:
+            print(f"读取工作流索引失败: {e}")
+            self._schedule_index_flush()
+            return
+        if not self._upload_index(storage):
+            self._schedule_index_flush()
+
+    def _schedule_index_flush(self):
+        """在 WORKFLOW_INDEX_FLUSH_INTERVAL 秒后合并写入索引（需持有 _index_lock）"""
+        if self._index_timer is None:
+            self._index_timer = threading.Timer(Config.WORKFLOW_INDEX_FLUSH_INTERVAL, self._on_index_timer)
+            self._index_timer.daemon = True
+            self._index_timer.start()
+
+    def _on_index_timer(self):
+        with self._index_lock:
+            self._index_timer = None
+            self._flush_index(get_storage_service())
+
+    def flush_index(self):
+        """立即写入所有待写入的索引变更（进程退出时调用）"""
+        with self._index_lock:
+            if self._index_timer is not None:
+                self._index_timer.cancel()
+                self._index_timer = None
+            if self._index_pending:
+                self._flush_index(get_storage_service())
+
+    def _index_upsert(self, workflow: dict):
+        """工作流保存后更新索引
+
+        摘要未变化时不写入；只有 updated_at 变化时先更新内存中的索引，
+        延迟合并写入存储，避免每次保存都重写整个索引。
+        """
+        summary = self._summarize(workflow)
+        with self._index_lock:
+            index = self._load_index()
+            if index is None:
+                return
+            current = index.get(workflow["id"])
+            if current == summary:
+                return
+            index[workflow["id"]] = summary
+            self._index_pending[workflow["id"]] = summary
+            if current is not None and self._stable_summary(current) == self._stable_summary(summary):
+                self._schedule_index_flush()
+            else:
+                self._flush_index(get_storage_service())
+
+    @staticmethod
+    def _stable_summary(summary: dict) -> dict:
+        """去掉 updated_at 的摘要，用于判断索引是否需要立即写入"""
+        return {key: value for key, value in summary.items() if key != "updated_at"}
+
+    def _index_remove(self, workflow_id: str):
+        """工作流删除后更新索引"""
+        with self._index_lock:
+            index = self._load_index()
+            if index is None or workflow_id not in index:
+                return
+            del index[workflow_id]
+            self._index_pending[workflow_id] = None
+            self._flush_index(get_storage_service())
+
+    def _split_workflow(self, workflow: dict) -> Tuple[dict, List[dict]]:
+        """拆分为头部和片段列表"""
+        header = {key: value for key, value in workflow.items() if key != 'segments'}
+        segments = workflow.get('segments', [])
+        header['segment_count'] = len(segments)
+        return header, segments
+
+    def _save_workflow(self, workflow: dict, previous: Optional[dict] = None,
+                       etags: Optional[Dict[str, str]] = None):
+        """保存工作流到存储后端
+
+        etags 为读取 previous 时各对象的ETag：与 previous 一一对应时只写入有变化的头部和片段，
+        否则（新建、旧版内嵌格式）全部写入。写入前比对存储中的ETag，不一致时抛出 WorkflowConflictError。
+        有任何写入时更新 updated_at 并递增 version（因此头部总会写入）。
+        """
+        workflow_id = workflow["id"]
+        prev_header, prev_segments = None, []
+        if previous is not None and etags and len(etags) == 1 + len(previous.get('segments', [])):
+            prev_header, prev_segments = self._split_workflow(previous)
+
+        header, segments = self._split_workflow(workflow)
+        changed = [
+            idx for idx, segment in enumerate(segments)
+            if idx >= len(prev_segments) or prev_segments[idx] != segment
+        ]
+        # 片段数减少时删除多余的片段对象
+        removed = list(range(len(segments), len(previous.get('segments', [])) if previous else 0))
+        if header == prev_header and not changed and not removed:
+            return
+
+        # 只修改片段时也更新 updated_at（片段进度可被列表的 since 过滤发现）并递增 version，
+        # 避免按旧版本整体替换片段列表时覆盖其他写入方对片段的修改
+        workflow['updated_at'] = header['updated_at'] = datetime.now().isoformat()
+        workflow['version'] = header['version'] = (previous or {}).get('version', 0) + 1
+
+        storage = get_storage_service()
+        # OSS不支持条件写入，写入前用一次列举确认读取后没有其他实例修改过
+        if etags and self._list_etags(storage, workflow_id) != etags:
+            raise WorkflowConflictError(f"工作流已被其他实例修改: {workflow_id}")
+
+        # 先写片段再写头部，读取方看到新的 segment_count 时片段已存在
+        try:
+            etags = dict(etags) if prev_header is not None else {}
+            for idx in changed:
+                key = self._get_segment_key(workflow_id, idx)
+                etags[key] = storage.put_data(key, *encode_document(segments[idx]))
+            key = self._get_workflow_key(workflow_id)
+            etags[key] = storage.put_data(key, *encode_document(header))
+            for idx in removed:
+                key = self._get_segment_key(workflow_id, idx)
+                storage.delete(key)
+                etags.pop(key, None)
+
+            # 写穿缓存
+            self._cache_put(workflow_id, copy.deepcopy(workflow), etags)
+            self._index_upsert(header)
+        except Exception as e:
+            # 写入失败时以存储为准，丢弃缓存
+            self._cache_invalidate(workflow_id)
+            print(f"保存工作流失败: {e}")
+
+    def _cache_get(self, workflow_id: str) -> Optional[dict]:
+        with self._cache_lock:
+            entry = self._cache.get(workflow_id)
+            if entry:
+                self._cache.move_to_end(workflow_id)
+            return entry
+
+    def _cache_put(self, workflow_id: str, workflow: dict, etags: Dict[str, str]):
+        """写入缓存（调用方需保证 workflow 不再被外部修改）"""
+        if Config.WORKFLOW_CACHE_SIZE <= 0:
+            return
+        with self._cache_lock:
+            self._cache[workflow_id] = {
+                "workflow": workflow,
+                "etags": etags,
+                "verified_at": time.time()
+            }
+            self._cache.move_to_end(workflow_id)
+            while len(self._cache) > Config.WORKFLOW_CACHE_SIZE:
+                self._cache.popitem(last=False)
 
-    def _save_local(self, workflow: dict):
-        """保存工作流到本地"""
-        path = self._get_workflow_path(workflow["id"])
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(workflow, f, ensure_ascii=False, indent=2)
+    def _cache_invalidate(self, workflow_id: str):
+        with self._cache_lock:
+            self._cache.pop(workflow_id, None)
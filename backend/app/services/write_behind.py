@@ -0,0 +1,192 @@
+import os
+import time
+import atexit
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+from ..config import Config
+from ..utils.http import get_backoff_delay
+
+
+class WriteBehindQueue:
+    """OSS异步写回队列（分层存储使用）
+
+    写入先落本地热层即返回，再由后台线程上传到OSS：
+    - 队列按对象键去重，同一对象的多次写入在上传前合并为一次（上传时读取本地最新内容）
+    - 待上传记录持久化在SQLite中，服务异常退出后重启继续上传
+    - 上传失败按指数退避重试；进程退出时等待队列清空（最长 WRITE_BEHIND_FLUSH_TIMEOUT 秒）
+    """
+
+    def __init__(self, local, remote):
+        self.local = local
+        self.remote = remote
+        self.db_path = Config.LOCAL_WRITE_BEHIND_PATH
+        # key -> {"op", "content_type", "seq", "enqueued_at", "attempts", "retry_at"}，按首次入队顺序上传
+        self._pending = OrderedDict()
+        self._inflight = set()
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._uploaded = 0
+        self._coalesced = 0
+        self._failed = 0
+        self._last_error = None
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS write_behind ('
+            'key TEXT PRIMARY KEY, op TEXT NOT NULL, content_type TEXT, seq INTEGER NOT NULL, enqueued_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+        self._recover()
+
+        for i in range(Config.WRITE_BEHIND_WORKERS):
+            threading.Thread(target=self._worker, name=f'write-behind-{i}', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _recover(self):
+        """加载上次退出前未完成的上传"""
+        rows = self._conn.execute(
+            'SELECT key, op, content_type, seq, enqueued_at FROM write_behind ORDER BY seq'
+        ).fetchall()
+        for key, op, content_type, seq, enqueued_at in rows:
+            self._pending[key] = {
+                "op": op, "content_type": content_type, "seq": seq,
+                "enqueued_at": enqueued_at, "attempts": 0, "retry_at": 0
+            }
+            self._seq = max(self._seq, seq)
+        if rows:
+            print(f"[写回] 恢复未完成的OSS写回: {len(rows)} 个对象")
+
+    def enqueue(self, key: str, op: str = 'put', content_type: Optional[str] = None):
+        """登记待写回的操作（put: 上传本地内容；delete: 删除对象；delete_prefix: 删除前缀下所有对象）"""
+        with self._cond:
+            self._seq += 1
+            entry = self._pending.get(key)
+            if entry:
+                # 合并：保留首次入队时间和位置，上传时读取最新内容
+                self._coalesced += 1
+                entry.update(op=op, content_type=content_type, seq=self._seq, attempts=0, retry_at=0)
+            else:
+                self._pending[key] = {
+                    "op": op, "content_type": content_type, "seq": self._seq,
+                    "enqueued_at": time.time(), "attempts": 0, "retry_at": 0
+                }
+            self._conn.execute(
+                'INSERT INTO write_behind (key, op, content_type, seq, enqueued_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET op = excluded.op, content_type = excluded.content_type, seq = excluded.seq',
+                (key, op, content_type, self._seq, self._pending[key]['enqueued_at'])
+            )
+            self._conn.commit()
+            self._cond.notify()
+
+    def is_deleted(self, key: str) -> bool:
+        """对象是否已在本地删除、等待写回OSS（此时不应再从OSS读取）"""
+        with self._cond:
+            entry = self._pending.get(key)
+            if entry:
+                return entry['op'] == 'delete'
+            return any(
+                entry['op'] == 'delete_prefix' and key.startswith(prefix)
+                for prefix, entry in self._pending.items()
+            )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """立即重试所有待写回操作并等待队列清空，返回是否全部完成"""
+        timeout = Config.WRITE_BEHIND_FLUSH_TIMEOUT if timeout is None else timeout
+        deadline = time.time() + timeout
+        with self._cond:
+            if not self._pending:
+                return True
+            print(f"[写回] 等待OSS写回完成: {len(self._pending)} 个对象")
+            for entry in self._pending.values():
+                entry['retry_at'] = 0
+            self._cond.notify_all()
+            while self._pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    print(f"[写回] 等待超时，剩余 {len(self._pending)} 个对象将在下次启动时继续写回")
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def get_stats(self) -> dict:
+        """队列状态：lag_seconds 为最早一个未写回操作已等待的时间"""
+        with self._cond:
+            oldest = min((entry['enqueued_at'] for entry in self._pending.values()), default=None)
+            return {
+                "pending": len(self._pending),
+                "inflight": len(self._inflight),
+                "lag_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+                "uploaded": self._uploaded,
+                "coalesced": self._coalesced,
+                "failed": self._failed,
+                "last_error": self._last_error
+            }
+
+    def _next(self):
+        """取出下一个可执行的操作（需持有锁），返回 (key, entry, 没有可执行操作时的等待时间)"""
+        now = time.time()
+        next_retry = None
+        for key, entry in self._pending.items():
+            if key in self._inflight:
+                continue
+            if entry['retry_at'] <= now:
+                self._inflight.add(key)
+                return key, dict(entry), None
+            next_retry = entry['retry_at'] if next_retry is None else min(next_retry, entry['retry_at'])
+        return None, None, (next_retry - now if next_retry is not None else None)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                key, entry, wait = self._next()
+                while key is None:
+                    self._cond.wait(wait)
+                    key, entry, wait = self._next()
+
+            error = None
+            try:
+                self._apply(key, entry)
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                self._inflight.discard(key)
+                current = self._pending.get(key)
+                # 上传期间又有新的写入时保留记录，由下一轮上传最新内容
+                if error is None:
+                    self._uploaded += 1
+                    if current and current['seq'] == entry['seq']:
+                        del self._pending[key]
+                        self._conn.execute('DELETE FROM write_behind WHERE key = ? AND seq = ?', (key, entry['seq']))
+                        self._conn.commit()
+                else:
+                    self._failed += 1
+                    self._last_error = f"{key}: {error}"
+                    print(f"[写回] OSS写回失败 {key}: {error}")
+                    if current and current['seq'] == entry['seq']:
+                        current['attempts'] += 1
+                        current['retry_at'] = time.time() + get_backoff_delay(
+                            current['attempts'], Config.WRITE_BEHIND_RETRY_INTERVAL
+                        )
+                self._cond.notify_all()
+
+    def _apply(self, key: str, entry: dict):
+        if entry['op'] == 'delete':
+            self.remote.delete(key)
+        elif entry['op'] == 'delete_prefix':
+            self.remote.delete_prefix(key)
+        else:
+            local_path = self.local.get_local_path(key)
+            if not local_path:
+                # 本地已删除，后续的删除操作会处理OSS上的对象
+                return
+            try:
+                with open(local_path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return
+            self.remote.put_data(key, data, entry['content_type'])
@@ -0,0 +1,107 @@
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ..config import Config
+
+
+# 需要重试的状态码（限流和服务端临时错误）
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# 按 Retry-After 响应头等待的状态码（与urllib3一致）
+RETRY_AFTER_STATUS_CODES = (413, 429, 503)
+
+# 单次退避等待上限（秒）
+MAX_BACKOFF = 30
+
+# 全局单例
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_backoff_delay(attempt: int, backoff_factor: float) -> float:
+    """第attempt次重试前的等待时间：指数退避，随机落在 [一半, 全部] 之间"""
+    backoff = min(MAX_BACKOFF, backoff_factor * (2 ** (attempt - 1)))
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数或HTTP日期），缺失或无法解析时返回None"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class JitteredRetry(Retry):
+    """指数退避加随机抖动，避免大量任务在同一时刻重试
+
+    POST（如提交视频任务）不是幂等请求，只在429限流时重试，避免重复提交。
+    """
+
+    def get_backoff_time(self) -> float:
+        attempts = len(self.history)
+        if attempts == 0:
+            return 0
+        return get_backoff_delay(attempts, self.backoff_factor)
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method == 'POST' and status_code == 429:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """未显式指定timeout的请求使用默认超时"""
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def get_http_session() -> requests.Session:
+    """获取共享的HTTP会话单例（连接池复用keep-alive连接，429/5xx自动重试）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def _create_session() -> requests.Session:
+    retry = JitteredRetry(
+        total=Config.HTTP_MAX_RETRIES,
+        backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=Config.HTTP_POOL_SIZE,
+        pool_maxsize=Config.HTTP_POOL_SIZE,
+        max_retries=retry,
+        timeout=(Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
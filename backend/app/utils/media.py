@@ -0,0 +1,93 @@
+import os
+from typing import Optional
+from urllib.parse import quote
+from flask import Response, redirect, request, send_file
+from ..config import Config
+
+
+# 响应体分块大小
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+def content_disposition(download_name: str) -> str:
+    """生成附件下载的Content-Disposition（支持中文文件名）"""
+    try:
+        download_name.encode('ascii')
+        return f'attachment; filename="{download_name}"'
+    except UnicodeEncodeError:
+        return f"attachment; filename*=UTF-8''{quote(download_name)}"
+
+
+def send_local_media(local_path: str, mimetype: str, as_attachment: bool = False,
+                     download_name: Optional[str] = None) -> Response:
+    """返回本地媒体文件
+
+    配置了 MEDIA_ACCEL_REDIRECT_PREFIX 时交给Nginx通过 X-Accel-Redirect 零拷贝发送，
+    否则由 send_file 处理（支持Range请求，USE_X_SENDFILE 开启时输出 X-Sendfile）。
+    """
+    if Config.MEDIA_ACCEL_REDIRECT_PREFIX:
+        relative_path = os.path.relpath(local_path, Config.LOCAL_DATA_DIR).replace(os.sep, '/')
+        response = Response(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = Config.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(relative_path)
+        if as_attachment:
+            response.headers['Content-Disposition'] = content_disposition(download_name or os.path.basename(local_path))
+        return response
+
+    return send_file(
+        local_path,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True
+    )
+
+
+def stream_oss_media(oss, oss_path: str, size: int, mimetype: str, as_attachment: bool = False,
+                     download_name: Optional[str] = None) -> Response:
+    """流式返回OSS对象，支持单段Range请求（206），不在内存中缓存整个文件"""
+    headers = {'Accept-Ranges': 'bytes'}
+    if as_attachment:
+        headers['Content-Disposition'] = content_disposition(download_name or os.path.basename(oss_path))
+
+    byte_range = None
+    if request.range and len(request.range.ranges) == 1:
+        byte_range = request.range.range_for_length(size)
+        if byte_range is None:
+            headers['Content-Range'] = f'bytes */{size}'
+            return Response(status=416, headers=headers)
+
+    if byte_range:
+        start, stop = byte_range
+        result = oss.get_object_stream(oss_path, byte_range=(start, stop - 1))
+        headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+        headers['Content-Length'] = str(stop - start)
+        status = 206
+    else:
+        result = oss.get_object_stream(oss_path)
+        headers['Content-Length'] = str(size)
+        status = 200
+
+    def generate():
+        try:
+            while True:
+                chunk = result.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            result.close()
+
+    return Response(generate(), status=status, mimetype=mimetype, headers=headers, direct_passthrough=True)
+
+
+def redirect_to_oss(oss, oss_path: str, as_attachment: bool = False,
+                    download_name: Optional[str] = None) -> Response:
+    """302跳转到短期有效的OSS签名URL，由OSS直接向客户端发送文件"""
+    params = None
+    if as_attachment:
+        params = {'response-content-disposition': content_disposition(download_name or os.path.basename(oss_path))}
+    url = oss.get_signed_url(oss_path, expires=Config.MEDIA_SIGNED_URL_EXPIRES, params=params)
+    response = redirect(url, code=302)
+    # 签名URL会过期，不允许缓存跳转
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,54 @@
+import json
+from typing import Tuple
+from ..config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+    import zstandard
+except ImportError:
+    msgpack = zstandard = None
+
+
+# zstd帧的魔数，读取时据此区分 msgpack+zstd 和 JSON
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+_warned = False
+
+
+def get_serialization_format() -> str:
+    """当前使用的序列化格式（msgpack 依赖未安装时退回 json）"""
+    global _warned
+    if Config.WORKFLOW_SERIALIZATION == 'msgpack':
+        if msgpack is not None:
+            return 'msgpack'
+        if not _warned:
+            _warned = True
+            print("[序列化] 未安装 msgpack/zstandard，改用JSON格式")
+    return 'json'
+
+
+def encode_document(data: dict) -> Tuple[bytes, str]:
+    """按配置的格式序列化文档，返回 (数据, Content-Type)"""
+    if get_serialization_format() == 'msgpack':
+        packed = msgpack.packb(data, use_bin_type=True)
+        return zstandard.ZstdCompressor(level=Config.WORKFLOW_ZSTD_LEVEL).compress(packed), 'application/octet-stream'
+    if orjson is not None:
+        # 与 json.dumps 一致，非字符串的键转换为字符串
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), 'application/json'
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 'application/json'
+
+
+def decode_document(data: bytes) -> dict:
+    """反序列化文档，按内容识别格式（兼容旧版缩进JSON）"""
+    if data[:4] == ZSTD_MAGIC:
+        if msgpack is None:
+            raise ValueError("读取 msgpack+zstd 格式需要安装 msgpack 和 zstandard")
+        return msgpack.unpackb(zstandard.ZstdDecompressor().decompress(data), raw=False, strict_map_key=False)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
@@ -1,5 +1,5 @@
 import { useState } from 'react';
-import { Scissors, Loader2, AlertCircle } from 'lucide-react';
+import { Scissors, Loader2, AlertCircle, RefreshCw } from 'lucide-react';
 import { useWorkflowStore } from '../../store/workflowStore';
 
 export default function Step1TextSplit() {
@@ -8,11 +8,13 @@ export default function Step1TextSplit() {
 
   const isProcessing = processing['split'];
   const error = errors['split'];
+  // 已拆分且文案未修改时可重新生成（跳过服务端缓存），普通拆分仍可命中缓存
+  const canRegenerate = !!currentWorkflow?.segments?.length && text === currentWorkflow.original_text;
 
-  const handleSplit = async () => {
+  const handleSplit = async (force = false) => {
     if (!text.trim()) return;
     try {
-      await splitText(text);
+      await splitText(text, force);
     } catch {
       // 错误已在store中处理
     }
@@ -41,23 +43,36 @@ export default function Step1TextSplit() {
       )}
 
       <div className="flex items-center justify-between">
-        <button
-          onClick={handleSplit}
-          disabled={!text.trim() || isProcessing}
-          className="flex items-center gap-2 px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
-        >
-          {isProcessing ? (
-            <>
-              <Loader2 className="w-4 h-4 animate-spin" />
-              拆分中...
-            </>
-          ) : (
-            <>
-              <Scissors className="w-4 h-4" />
-              拆分文案
-            </>
+        <div className="flex items-center gap-3">
+          <button
+            onClick={() => handleSplit()}
+            disabled={!text.trim() || isProcessing}
+            className="flex items-center gap-2 px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
+          >
+            {isProcessing ? (
+              <>
+                <Loader2 className="w-4 h-4 animate-spin" />
+                拆分中...
+              </>
+            ) : (
+              <>
+                <Scissors className="w-4 h-4" />
+                拆分文案
+              </>
+            )}
+          </button>
+          {canRegenerate && (
+            <button
+              onClick={() => handleSplit(true)}
+              disabled={isProcessing}
+              className="flex items-center gap-2 px-4 py-2 border border-blue-600 text-blue-600 rounded-lg hover:bg-blue-50 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
+              title="不使用缓存，重新调用模型拆分"
+            >
+              <RefreshCw className="w-4 h-4" />
+              重新生成
+            </button>
           )}
-        </button>
+        </div>
 
         {currentWorkflow?.segments && currentWorkflow.segments.length > 0 && (
           <span className="text-sm text-gray-500">
@@ -1,6 +1,6 @@
-import { useEffect, useRef, useCallback } from 'react';
+import { useRef } from 'react';
 import { Wand2, Upload, Play, Loader2, AlertCircle, Check, Image, Video, RefreshCw, X } from 'lucide-react';
-import { useWorkflowStore } from '../../store/workflowStore';
+import { useWorkflowStore, isSegmentInProgress } from '../../store/workflowStore';
 
 export default function Step2SegmentProcess() {
   const { 
@@ -8,43 +8,15 @@ export default function Step2SegmentProcess() {
     processing, 
     errors, 
     optimizePrompt, 
+    optimizeAllPrompts,
     updateSegment,
     uploadImage,
     generateVideo,
-    generateAllVideos,
-    checkVideoStatus
+    generateAllVideos
   } = useWorkflowStore();
   
+  // 视频状态由工作流事件流推送更新（见 WorkflowPage）
   const fileInputRefs = useRef<Record<number, HTMLInputElement | null>>({});
-  const pollingRef = useRef<Record<number, NodeJS.Timeout>>({});
-
-  // 轮询检查视频状态
-  const startPolling = useCallback((idx: number) => {
-    if (pollingRef.current[idx]) return;
-    
-    pollingRef.current[idx] = setInterval(async () => {
-      await checkVideoStatus(idx);
-      
-      const segment = currentWorkflow?.segments[idx];
-      if (segment?.video_status === 'completed' || segment?.video_status === 'failed') {
-        clearInterval(pollingRef.current[idx]);
-        delete pollingRef.current[idx];
-      }
-    }, 5000);
-  }, [checkVideoStatus, currentWorkflow?.segments]);
-
-  useEffect(() => {
-    currentWorkflow?.segments.forEach((segment, idx) => {
-      if (segment.video_status === 'generating' && !pollingRef.current[idx]) {
-        startPolling(idx);
-      }
-    });
-
-    return () => {
-      Object.values(pollingRef.current).forEach(clearInterval);
-      pollingRef.current = {};
-    };
-  }, [currentWorkflow?.segments, startPolling]);
 
   if (!currentWorkflow?.segments || currentWorkflow.segments.length === 0) {
     return (
@@ -56,7 +28,16 @@ export default function Step2SegmentProcess() {
 
   const handleOptimize = async (idx: number) => {
     try {
-      await optimizePrompt(idx);
+      // 已有提示词时重新生成，跳过服务端缓存
+      await optimizePrompt(idx, undefined, !!currentWorkflow.segments[idx].prompt);
+    } catch {
+      // 错误已在store中处理
+    }
+  };
+
+  const handleOptimizeAll = async () => {
+    try {
+      await optimizeAllPrompts();
     } catch {
       // 错误已在store中处理
     }
@@ -81,7 +62,6 @@ export default function Step2SegmentProcess() {
   const handleGenerate = async (idx: number) => {
     try {
       await generateVideo(idx);
-      startPolling(idx);
     } catch {
       // 错误已在store中处理
     }
@@ -95,22 +75,22 @@ export default function Step2SegmentProcess() {
       return;
     }
     await generateAllVideos();
-    currentWorkflow.segments.forEach((_, idx) => {
-      if (currentWorkflow.segments[idx].video_status === 'generating') {
-        startPolling(idx);
-      }
-    });
   };
 
   const allHavePrompts = currentWorkflow.segments.every(s => s.prompt);
   const allHaveImages = currentWorkflow.segments.every(s => s.image_url);
   const allCompleted = currentWorkflow.segments.every(s => s.video_status === 'completed');
-  const anyGenerating = currentWorkflow.segments.some(s => s.video_status === 'generating');
+  // 已提交但仍在百炼排队（pending 且有任务ID）的片段也算进行中，避免重复提交
+  const anyGenerating = processing['generate-all'] || currentWorkflow.segments.some(isSegmentInProgress);
+  const generateAllError = errors['generate-all'];
+  const isOptimizingAll = processing['optimize-all'];
+  const optimizeAllError = errors['optimize-all'];
 
   const getStatusBadge = (status: string) => {
     const badges: Record<string, { text: string; className: string }> = {
       pending: { text: '待生成', className: 'bg-gray-100 text-gray-600' },
       generating: { text: '生成中', className: 'bg-blue-100 text-blue-600' },
+      ingesting: { text: '转存中', className: 'bg-indigo-100 text-indigo-600' },
       completed: { text: '已完成', className: 'bg-green-100 text-green-600' },
       failed: { text: '失败', className: 'bg-red-100 text-red-600' }
     };
@@ -121,6 +101,18 @@ export default function Step2SegmentProcess() {
     <div className="space-y-6">
       {/* 批量操作按钮 */}
       <div className="flex items-center justify-end gap-3">
+        <button
+          onClick={handleOptimizeAll}
+          disabled={isOptimizingAll}
+          className="flex items-center gap-2 px-4 py-2 border border-blue-600 text-blue-600 text-sm rounded-lg hover:bg-blue-50 disabled:opacity-50 transition-colors"
+        >
+          {isOptimizingAll ? (
+            <Loader2 className="w-4 h-4 animate-spin" />
+          ) : (
+            <Wand2 className="w-4 h-4" />
+          )}
+          {allHavePrompts ? '重新生成所有提示词' : '一键生成所有提示词'}
+        </button>
         {allHavePrompts && allHaveImages && !allCompleted && (
           <button
             onClick={handleGenerateAll}
@@ -132,12 +124,23 @@ export default function Step2SegmentProcess() {
           </button>
         )}
       </div>
+      {optimizeAllError && (
+        <p className="text-red-500 text-sm flex items-center justify-end gap-1">
+          <AlertCircle className="w-4 h-4" /> {optimizeAllError}
+        </p>
+      )}
+      {generateAllError && (
+        <p className="text-red-500 text-sm flex items-center justify-end gap-1">
+          <AlertCircle className="w-4 h-4" /> {generateAllError}
+        </p>
+      )}
 
       {/* 片段列表 */}
       {currentWorkflow.segments.map((segment, idx) => {
         const isOptimizing = processing[`optimize-${idx}`];
         const isUploading = processing[`upload-${idx}`];
-        const isGenerating = processing[`generate-${idx}`] || segment.video_status === 'generating';
+        const isIngesting = segment.video_status === 'ingesting';
+        const isGenerating = processing[`generate-${idx}`] || isSegmentInProgress(segment);
         const optimizeError = errors[`optimize-${idx}`];
         const uploadError = errors[`upload-${idx}`];
         const generateError = errors[`generate-${idx}`];
@@ -294,7 +297,7 @@ export default function Step2SegmentProcess() {
                       {isGenerating ? (
                         <>
                           <Loader2 className="w-6 h-6 text-blue-500 animate-spin mb-1" />
-                          <span className="text-xs text-gray-500">生成中...</span>
+                          <span className="text-xs text-gray-500">{isIngesting ? '转存中...' : '生成中...'}</span>
                         </>
                       ) : (
                         <>
@@ -3,7 +3,7 @@ import { useWorkflowStore } from '../../store/workflowStore';
 import { workflowService } from '../../services/workflowService';
 
 export default function Step5VideoMerge() {
-  const { currentWorkflow, processing, errors, mergeVideos } = useWorkflowStore();
+  const { currentWorkflow, processing, errors, mergeProgress, mergeVideos } = useWorkflowStore();
 
   if (!currentWorkflow?.segments || currentWorkflow.segments.length === 0) {
     return (
@@ -14,7 +14,7 @@ export default function Step5VideoMerge() {
   }
 
   const allVideosCompleted = currentWorkflow.segments.every(s => s.video_status === 'completed' && s.video_url);
-  const isMerging = processing['merge'];
+  const isMerging = processing['merge'] || currentWorkflow.status === 'merging';
   const error = errors['merge'];
 
   const handleMerge = async () => {
@@ -87,7 +87,11 @@ export default function Step5VideoMerge() {
             <div className="flex flex-col items-center justify-center py-12 bg-gray-50 rounded-lg">
               <Loader2 className="w-12 h-12 text-green-500 animate-spin mb-4" />
               <p className="text-gray-600">正在合成视频，请稍候...</p>
-              <p className="text-sm text-gray-400 mt-1">这可能需要几分钟时间</p>
+              {mergeProgress !== null ? (
+                <p className="text-sm text-gray-400 mt-1">已完成 {Math.round(mergeProgress * 100)}%</p>
+              ) : (
+                <p className="text-sm text-gray-400 mt-1">这可能需要几分钟时间</p>
+              )}
             </div>
           )}
 
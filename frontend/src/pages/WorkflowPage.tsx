@@ -9,7 +9,8 @@ import Step5VideoMerge from '../components/steps/Step5VideoMerge';
 export default function WorkflowPage() {
   const { id } = useParams<{ id: string }>();
   const navigate = useNavigate();
-  const { currentWorkflow, loadingWorkflow, loadWorkflow, clearCurrentWorkflow } = useWorkflowStore();
+  const { currentWorkflow, loadingWorkflow, loadWorkflow, clearCurrentWorkflow, subscribeEvents } = useWorkflowStore();
+  const loadedWorkflowId = currentWorkflow?.id;
 
   useEffect(() => {
     if (id) {
@@ -20,6 +21,12 @@ export default function WorkflowPage() {
     };
   }, [id, loadWorkflow, clearCurrentWorkflow]);
 
+  // 订阅片段状态和合成事件，替代逐片段轮询
+  useEffect(() => {
+    if (!loadedWorkflowId) return;
+    return subscribeEvents();
+  }, [loadedWorkflowId, subscribeEvents]);
+
   if (loadingWorkflow) {
     return (
       <div className="flex items-center justify-center min-h-screen">
@@ -2,14 +2,27 @@ import api from './api';
 import type { 
   Workflow, 
   WorkflowSummary, 
+  WorkflowListParams,
   SplitResponse, 
+  SplitStreamEvent,
   OptimizeResponse,
+  OptimizeAllResponse,
   UploadImageResponse,
   GenerateVideoResponse,
+  GenerateAllResponse,
   VideoStatusResponse,
-  MergeResponse
+  MergeJob,
+  SegmentStatusEvent,
+  WorkflowSnapshotEvent,
+  MergeEvent
 } from '../types';
 
+export interface WorkflowEventHandlers {
+  onSnapshot?: (event: WorkflowSnapshotEvent) => void;
+  onSegmentStatus?: (event: SegmentStatusEvent) => void;
+  onMerge?: (event: MergeEvent) => void;
+}
+
 export const workflowService = {
   // 工作流管理
   async createWorkflow(name?: string): Promise<Workflow> {
@@ -17,8 +30,8 @@ export const workflowService = {
     return data;
   },
 
-  async getWorkflows(): Promise<WorkflowSummary[]> {
-    const { data } = await api.get('/workflows');
+  async getWorkflows(params?: WorkflowListParams): Promise<WorkflowSummary[]> {
+    const { data } = await api.get('/workflows', { params });
     return data;
   },
 
@@ -37,13 +50,61 @@ export const workflowService = {
   },
 
   // 视频生成流程
-  async splitText(workflowId: string, text: string): Promise<SplitResponse> {
-    const { data } = await api.post(`/workflow/${workflowId}/split`, { text });
+  async splitText(workflowId: string, text: string, force = false): Promise<SplitResponse> {
+    const { data } = await api.post(`/workflow/${workflowId}/split`, { text, force });
+    return data;
+  },
+
+  // 流式拆分：每拆分出一个片段回调一次，完成后返回保存后的片段列表
+  async splitTextStream(
+    workflowId: string,
+    text: string,
+    onSegment: (index: number, text: string) => void,
+    force = false
+  ): Promise<SplitResponse> {
+    const response = await fetch(`/api/workflow/${workflowId}/split-stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ text, force })
+    });
+    if (!response.ok || !response.body) {
+      const data = await response.json().catch(() => ({}));
+      throw new Error(data.error || '请求失败');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop() ?? '';
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const event = JSON.parse(line) as SplitStreamEvent;
+        if (event.type === 'segment') onSegment(event.index, event.text);
+        else if (event.type === 'done') return { segments: event.segments };
+        else throw new Error(event.error);
+      }
+    }
+    throw new Error('文案拆分中断');
+  },
+
+  async optimizePrompt(workflowId: string, segmentIdx: number, text?: string, force = false): Promise<OptimizeResponse> {
+    const { data } = await api.post(`/workflow/${workflowId}/segment/${segmentIdx}/optimize`, { text, force });
     return data;
   },
 
-  async optimizePrompt(workflowId: string, segmentIdx: number, text?: string): Promise<OptimizeResponse> {
-    const { data } = await api.post(`/workflow/${workflowId}/segment/${segmentIdx}/optimize`, { text });
+  async optimizeAllPrompts(
+    workflowId: string,
+    options: { onlyMissing?: boolean; force?: boolean } = {}
+  ): Promise<OptimizeAllResponse> {
+    const { data } = await api.post(`/workflow/${workflowId}/optimize-all`, {
+      only_missing: options.onlyMissing,
+      force: options.force
+    });
     return data;
   },
 
@@ -63,16 +124,39 @@ export const workflowService = {
     return data;
   },
 
+  async generateAllVideos(workflowId: string): Promise<GenerateAllResponse> {
+    const { data } = await api.post(`/workflow/${workflowId}/generate-all`);
+    return data;
+  },
+
   async getVideoStatus(workflowId: string, segmentIdx: number): Promise<VideoStatusResponse> {
     const { data } = await api.get(`/workflow/${workflowId}/segment/${segmentIdx}/video-status`);
     return data;
   },
 
-  async mergeVideos(workflowId: string): Promise<MergeResponse> {
+  async mergeVideos(workflowId: string): Promise<MergeJob> {
     const { data } = await api.post(`/workflow/${workflowId}/merge`);
     return data;
   },
 
+  async getMergeStatus(workflowId: string): Promise<MergeEvent> {
+    const { data } = await api.get(`/workflow/${workflowId}/merge-status`);
+    return data;
+  },
+
+  // 订阅工作流事件（片段状态变化、合成完成），返回取消订阅函数
+  subscribeEvents(workflowId: string, handlers: WorkflowEventHandlers): () => void {
+    const source = new EventSource(`/api/workflow/${workflowId}/events`);
+    const listen = <T>(event: string, handler?: (data: T) => void) => {
+      if (!handler) return;
+      source.addEventListener(event, (e) => handler(JSON.parse((e as MessageEvent).data)));
+    };
+    listen('snapshot', handlers.onSnapshot);
+    listen('segment_status', handlers.onSegmentStatus);
+    listen('merge', handlers.onMerge);
+    return () => source.close();
+  },
+
   getDownloadUrl(workflowId: string): string {
     return `/api/workflow/${workflowId}/download`;
   }
@@ -1,7 +1,17 @@
 import { create } from 'zustand';
-import type { Workflow, WorkflowSummary, Segment } from '../types';
+import type { Workflow, WorkflowSummary, Segment, SegmentStatusEvent, MergeEvent } from '../types';
 import { workflowService } from '../services/workflowService';
 
+// 事件总线只在单个后端进程内有效，多进程部署时其他进程产生的事件不会推送到本连接，
+// 有进行中的任务时按该间隔慢速轮询工作流兜底
+const FALLBACK_POLL_INTERVAL = 30000;
+
+// 片段是否有进行中的视频任务（已提交但仍在百炼排队的任务状态为 pending）
+export const isSegmentInProgress = (segment: Segment) =>
+  segment.video_status === 'generating' ||
+  segment.video_status === 'ingesting' ||
+  (segment.video_status === 'pending' && !!segment.video_task_id);
+
 interface WorkflowState {
   // 工作流列表
   workflows: WorkflowSummary[];
@@ -14,6 +24,7 @@ interface WorkflowState {
   // 操作状态
   processing: Record<string, boolean>;
   errors: Record<string, string>;
+  mergeProgress: number | null;
 
   // 工作流列表操作
   fetchWorkflows: () => Promise<void>;
@@ -26,13 +37,18 @@ interface WorkflowState {
   updateSegment: (idx: number, updates: Partial<Segment>) => void;
 
   // 视频生成流程
-  splitText: (text: string) => Promise<void>;
-  optimizePrompt: (idx: number, text?: string) => Promise<void>;
+  splitText: (text: string, force?: boolean) => Promise<void>;
+  optimizePrompt: (idx: number, text?: string, force?: boolean) => Promise<void>;
+  optimizeAllPrompts: () => Promise<void>;
   uploadImage: (idx: number, file: File) => Promise<void>;
   generateVideo: (idx: number) => Promise<void>;
   generateAllVideos: () => Promise<void>;
   checkVideoStatus: (idx: number) => Promise<void>;
   mergeVideos: () => Promise<void>;
+  applyMergeEvent: (event: MergeEvent) => void;
+
+  // 事件推送
+  subscribeEvents: () => () => void;
 
   // 工具方法
   setProcessing: (key: string, value: boolean) => void;
@@ -46,6 +62,7 @@ export const useWorkflowStore = create<WorkflowState>((set, get) => ({
   loadingWorkflow: false,
   processing: {},
   errors: {},
+  mergeProgress: null,
 
   fetchWorkflows: async () => {
     set({ loadingList: true });
@@ -84,7 +101,7 @@ export const useWorkflowStore = create<WorkflowState>((set, get) => ({
   },
 
   clearCurrentWorkflow: () => {
-    set({ currentWorkflow: null, errors: {}, processing: {} });
+    set({ currentWorkflow: null, errors: {}, processing: {}, mergeProgress: null });
   },
 
   updateSegment: (idx: number, updates: Partial<Segment>) => {
@@ -98,7 +115,7 @@ export const useWorkflowStore = create<WorkflowState>((set, get) => ({
     });
   },
 
-  splitText: async (text: string) => {
+  splitText: async (text: string, force = false) => {
     const { currentWorkflow, setProcessing, setError } = get();
     if (!currentWorkflow) return;
 
@@ -106,7 +123,23 @@ export const useWorkflowStore = create<WorkflowState>((set, get) => ({
     setError('split', null);
 
     try {
-      const result = await workflowService.splitText(currentWorkflow.id, text);
+      // 流式接收拆分结果，片段逐个显示
+      const preview: Segment[] = [];
+      const result = await workflowService.splitTextStream(currentWorkflow.id, text, (index, original) => {
+        preview[index] = {
+          index,
+          original,
+          prompt: null,
+          image_url: null,
+          video_url: null,
+          video_status: 'pending',
+          video_task_id: null
+        };
+        const { currentWorkflow: latest } = get();
+        if (latest?.id === currentWorkflow.id) {
+          set({ currentWorkflow: { ...latest, segments: [...preview] } });
+        }
+      }, force);
       set({
         currentWorkflow: {
           ...currentWorkflow,
@@ -122,7 +155,7 @@ export const useWorkflowStore = create<WorkflowState>((set, get) => ({
     }
   },
 
-  optimizePrompt: async (idx: number, text?: string) => {
+  optimizePrompt: async (idx: number, text?: string, force = false) => {
     const { currentWorkflow, setProcessing, setError, updateSegment } = get();
     if (!currentWorkflow) return;
 
@@ -131,7 +164,7 @@ export const useWorkflowStore = create<WorkflowState>((set, get) => ({
     setError(key, null);
 
     try {
-      const result = await workflowService.optimizePrompt(currentWorkflow.id, idx, text);
+      const result = await workflowService.optimizePrompt(currentWorkflow.id, idx, text, force);
       updateSegment(idx, { prompt: result.prompt });
     } catch (error) {
       setError(key, (error as Error).message);
@@ -141,6 +174,29 @@ export const useWorkflowStore = create<WorkflowState>((set, get) => ({
     }
   },
 
+  optimizeAllPrompts: async () => {
+    const { currentWorkflow, setProcessing, setError, updateSegment } = get();
+    if (!currentWorkflow) return;
+
+    setProcessing('optimize-all', true);
+    setError('optimize-all', null);
+
+    try {
+      // 有缺失时只补全缺失的提示词，全部已有时重新生成全部
+      const onlyMissing = currentWorkflow.segments.some(s => !s.prompt);
+      const result = await workflowService.optimizeAllPrompts(currentWorkflow.id, {
+        onlyMissing,
+        force: !onlyMissing
+      });
+      result.prompts.forEach(({ index, prompt }) => updateSegment(index, { prompt }));
+    } catch (error) {
+      setError('optimize-all', (error as Error).message);
+      throw error;
+    } finally {
+      setProcessing('optimize-all', false);
+    }
+  },
+
   uploadImage: async (idx: number, file: File) => {
     const { currentWorkflow, setProcessing, setError, updateSegment } = get();
     if (!currentWorkflow) return;
@@ -183,14 +239,26 @@ export const useWorkflowStore = create<WorkflowState>((set, get) => ({
   },
 
   generateAllVideos: async () => {
-    const { currentWorkflow, generateVideo } = get();
+    const { currentWorkflow, setProcessing, setError, updateSegment } = get();
     if (!currentWorkflow) return;
 
-    for (let i = 0; i < currentWorkflow.segments.length; i++) {
-      const segment = currentWorkflow.segments[i];
-      if (segment.prompt && segment.video_status !== 'completed') {
-        await generateVideo(i);
-      }
+    setProcessing('generate-all', true);
+    setError('generate-all', null);
+
+    try {
+      const result = await workflowService.generateAllVideos(currentWorkflow.id);
+      result.submitted.forEach(({ index, task_id }) => {
+        setError(`generate-${index}`, null);
+        updateSegment(index, {
+          video_task_id: task_id,
+          video_status: 'generating'
+        });
+      });
+      result.failed.forEach(({ index, error }) => setError(`generate-${index}`, error));
+    } catch (error) {
+      setError('generate-all', (error as Error).message);
+    } finally {
+      setProcessing('generate-all', false);
     }
   },
 
@@ -210,29 +278,103 @@ export const useWorkflowStore = create<WorkflowState>((set, get) => ({
   },
 
   mergeVideos: async () => {
-    const { currentWorkflow, setProcessing, setError } = get();
+    const { currentWorkflow, setProcessing, setError, applyMergeEvent } = get();
     if (!currentWorkflow) return;
 
     setProcessing('merge', true);
     setError('merge', null);
 
     try {
-      const result = await workflowService.mergeVideos(currentWorkflow.id);
-      set({
-        currentWorkflow: {
-          ...currentWorkflow,
-          final_video_url: result.final_video_url,
-          status: 'completed'
-        }
-      });
+      // 合成在后台进行，进度和结果由事件流推送
+      const job = await workflowService.mergeVideos(currentWorkflow.id);
+      applyMergeEvent({ ...job, job_id: job.id });
     } catch (error) {
       setError('merge', (error as Error).message);
-      throw error;
-    } finally {
       setProcessing('merge', false);
+      throw error;
     }
   },
 
+  applyMergeEvent: (event: MergeEvent) => {
+    const { currentWorkflow, setProcessing, setError } = get();
+    if (!currentWorkflow) return;
+
+    const finished = event.status === 'completed' || event.status === 'failed';
+    setProcessing('merge', !finished);
+    set({ mergeProgress: finished ? null : event.progress });
+    if (event.status === 'failed') {
+      setError('merge', event.error || '视频合成失败');
+    }
+    set({
+      currentWorkflow: {
+        ...currentWorkflow,
+        final_video_url: event.final_video_url || currentWorkflow.final_video_url,
+        status: finished ? (event.status === 'completed' ? 'completed' : 'failed') : 'merging'
+      }
+    });
+  },
+
+  subscribeEvents: () => {
+    const { currentWorkflow } = get();
+    if (!currentWorkflow) return () => {};
+
+    const workflowId = currentWorkflow.id;
+    const applySegmentStatus = (event: SegmentStatusEvent) => {
+      const { currentWorkflow, updateSegment } = get();
+      if (currentWorkflow?.id !== workflowId || !currentWorkflow.segments[event.index]) return;
+      updateSegment(event.index, {
+        video_status: event.status,
+        video_url: event.video_url || currentWorkflow.segments[event.index].video_url,
+        video_error: event.error
+      });
+    };
+
+    const applyMergeEvent = (event: MergeEvent) => {
+      if (get().currentWorkflow?.id === workflowId) get().applyMergeEvent(event);
+    };
+
+    const unsubscribe = workflowService.subscribeEvents(workflowId, {
+      onSnapshot: (event) => {
+        event.segments.forEach(applySegmentStatus);
+        // 页面打开时已有合成任务：查询一次当前进度（服务重启后任务可能已中断）
+        if (event.status === 'merging') {
+          workflowService.getMergeStatus(workflowId).then(applyMergeEvent).catch(() => {});
+        }
+      },
+      onSegmentStatus: applySegmentStatus,
+      onMerge: applyMergeEvent
+    });
+
+    const timer = setInterval(async () => {
+      const { currentWorkflow } = get();
+      if (currentWorkflow?.id !== workflowId) return;
+      if (currentWorkflow.status !== 'merging' && !currentWorkflow.segments.some(isSegmentInProgress)) return;
+      try {
+        const workflow = await workflowService.getWorkflow(workflowId);
+        workflow.segments.forEach((segment, index) => applySegmentStatus({
+          index,
+          status: segment.video_status,
+          video_url: segment.video_url,
+          error: segment.video_error
+        }));
+        if (get().currentWorkflow?.status === 'merging' && workflow.status !== 'merging') {
+          applyMergeEvent({
+            status: workflow.status === 'completed' ? 'completed' : 'failed',
+            progress: 1,
+            final_video_url: workflow.final_video_url
+          });
+        }
+      } catch {
+        // 下次轮询重试
+      }
+    }, FALLBACK_POLL_INTERVAL);
+
+    return () => {
+      clearInterval(timer);
+      unsubscribe();
+    };
+  },
+
   setProcessing: (key: string, value: boolean) => {
     set((state) => ({
       processing: { ...state.processing, [key]: value }
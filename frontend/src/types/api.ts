@@ -7,10 +7,20 @@ export interface SplitResponse {
   segments: import('./workflow').Segment[];
 }
 
+// 流式拆分（NDJSON，每行一个事件）
+export type SplitStreamEvent =
+  | { type: 'segment'; index: number; text: string }
+  | { type: 'done'; segments: import('./workflow').Segment[] }
+  | { type: 'error'; error: string };
+
 export interface OptimizeResponse {
   prompt: string;
 }
 
+export interface OptimizeAllResponse {
+  prompts: { index: number; prompt: string }[];
+}
+
 export interface UploadImageResponse {
   image_url: string;
 }
@@ -20,12 +30,45 @@ export interface GenerateVideoResponse {
   status: string;
 }
 
+export interface GenerateAllResponse {
+  submitted: { index: number; task_id: string }[];
+  failed: { index: number; error: string }[];
+}
+
 export interface VideoStatusResponse {
-  status: 'pending' | 'generating' | 'completed' | 'failed';
+  status: 'pending' | 'generating' | 'ingesting' | 'completed' | 'failed';
   video_url?: string;
   error?: string;
 }
 
-export interface MergeResponse {
-  final_video_url: string;
+export interface MergeJob {
+  id: string;
+  workflow_id: string;
+  status: 'queued' | 'merging' | 'completed' | 'failed';
+  progress: number;
+  error: string | null;
+  final_video_url: string | null;
+  created_at: string;
+}
+
+// 工作流事件流（SSE）
+export interface SegmentStatusEvent {
+  index: number;
+  status: import('./workflow').Segment['video_status'];
+  video_url?: string | null;
+  error?: string | null;
+}
+
+export interface WorkflowSnapshotEvent {
+  segments: SegmentStatusEvent[];
+  final_video_url: string | null;
+  status: import('./workflow').Workflow['status'];
+}
+
+export interface MergeEvent {
+  job_id?: string;
+  status: MergeJob['status'];
+  progress: number;
+  error?: string | null;
+  final_video_url?: string | null;
 }
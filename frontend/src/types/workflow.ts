@@ -4,8 +4,9 @@ export interface Segment {
   prompt: string | null;
   image_url: string | null;
   video_url: string | null;
-  video_status: 'pending' | 'generating' | 'completed' | 'failed';
+  video_status: 'pending' | 'generating' | 'ingesting' | 'completed' | 'failed';
   video_task_id: string | null;
+  video_error?: string | null;
 }
 
 export interface Workflow {
@@ -16,13 +17,22 @@ export interface Workflow {
   original_text: string;
   segments: Segment[];
   final_video_url: string | null;
-  status: 'draft' | 'processing' | 'completed' | 'failed';
+  status: 'draft' | 'processing' | 'merging' | 'completed' | 'failed';
+  version?: number;
 }
 
 export interface WorkflowSummary {
   id: string;
   name: string;
   created_at: string;
+  updated_at?: string | null;
   status: string;
   segment_count: number;
 }
+
+export interface WorkflowListParams {
+  status?: string;
+  since?: string;
+  offset?: number;
+  limit?: number;
+}